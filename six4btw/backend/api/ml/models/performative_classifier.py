@@ -1,24 +1,52 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.base import clone
 from sklearn.svm import SVC
 from sklearn.neural_network import MLPClassifier
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import train_test_split, cross_val_score, HalvingGridSearchCV
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 import joblib
-import pickle
+from joblib import Parallel, delayed
 from datetime import datetime
+import hashlib
 import os
+import tempfile
+
+try:
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    ort = None
+
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESSION = ('lz4', 3)
+except ImportError:
+    MODEL_COMPRESSION = ('zlib', 3)
+
+try:
+    import treelite
+    import treelite_runtime
+except ImportError:
+    treelite = None
 
 class PerformativeClassifier:
     def __init__(self, model_type='random_forest'):
         self.model_type = model_type
         self.model = None
         self.scaler = StandardScaler()
+        self._scaler_params = None
         self.label_encoder = LabelEncoder()
         self.feature_names = []
         self.is_trained = False
+        self._ort_sess = None
+        self._onnx_bytes = None
+        self._predictor = None
         
         self.model_configs = {
             'random_forest': {
@@ -28,15 +56,17 @@ class PerformativeClassifier:
                     'max_depth': 15,
                     'min_samples_split': 5,
                     'min_samples_leaf': 2,
+                    'n_jobs': -1,
                     'random_state': 42
                 }
             },
             'gradient_boost': {
-                'model': GradientBoostingClassifier,
+                'model': HistGradientBoostingClassifier,
                 'params': {
-                    'n_estimators': 150,
+                    'max_iter': 200,
                     'learning_rate': 0.1,
                     'max_depth': 8,
+                    'max_bins': 255,
                     'random_state': 42
                 }
             },
@@ -97,26 +127,109 @@ class PerformativeClassifier:
         
         return data[all_features] if isinstance(data, pd.DataFrame) else np.array(data)
     
-    def train(self, X, y, validation_split=0.2):
-        X_features = self.prepare_features(X)
+    def _export_onnx(self):
+        if ort is None:
+            return None
+        
+        try:
+            onnx_model = convert_sklearn(
+                self.model,
+                initial_types=[('input', FloatTensorType([None, len(self.feature_names)]))],
+                options={id(self.model): {'zipmap': False}}
+            )
+            return onnx_model.SerializeToString()
+        except Exception:
+            return None
+    
+    def _load_onnx_session(self, onnx_bytes):
+        self._onnx_bytes = onnx_bytes
+        self._ort_sess = None
+        
+        if ort is None or onnx_bytes is None:
+            return
         
+        try:
+            self._ort_sess = ort.InferenceSession(onnx_bytes, providers=['CPUExecutionProvider'])
+        except Exception:
+            self._ort_sess = None
+    
+    def _load_treelite_predictor(self, filepath):
+        self._predictor = None
+        
+        if treelite is None or self.model_type not in ('random_forest', 'gradient_boost'):
+            return
+        
+        try:
+            with open(filepath, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:16]
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(filepath)), '.treelite_cache')
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            libpath = os.path.join(cache_dir, f'perf_tree_{digest}.so')
+            
+            if not os.path.exists(libpath):
+                fd, tmp_path = tempfile.mkstemp(suffix='.so', dir=cache_dir)
+                os.close(fd)
+                try:
+                    treelite_model = treelite.sklearn.import_model(self.model)
+                    treelite_model.export_lib(toolchain='gcc', libpath=tmp_path)
+                    os.replace(tmp_path, libpath)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            
+            self._predictor = treelite_runtime.Predictor(libpath, nthread=1)
+        except Exception:
+            self._predictor = None
+    
+    def _prepare_training_data(self, X, y):
+        X_features = self.prepare_features(X)
         y_encoded = self.label_encoder.fit_transform(y)
+        return X_features, y_encoded
+    
+    def _build_pipeline(self, single_threaded=False):
+        classifier = clone(self.model)
+        if single_threaded and 'n_jobs' in classifier.get_params():
+            classifier.set_params(n_jobs=1)
         
-        X_scaled = self.scaler.fit_transform(X_features)
+        return Pipeline([('scale', StandardScaler()), ('clf', classifier)])
+    
+    def _adopt_pipeline(self, pipeline):
+        self.scaler = pipeline.named_steps['scale']
+        self.model = pipeline.named_steps['clf']
+        self._scaler_params = None
+        self.is_trained = True
+        self._load_onnx_session(None)
+        self._predictor = None
+    
+    def _scale_inplace(self, X):
+        if self._scaler_params is None:
+            self._scaler_params = (
+                self.scaler.mean_.astype(np.float32),
+                (1.0 / self.scaler.scale_).astype(np.float32)
+            )
+        
+        mean, inv_scale = self._scaler_params
+        np.subtract(X, mean, out=X)
+        np.multiply(X, inv_scale, out=X)
+        return X
+    
+    def train(self, X, y, validation_split=0.2):
+        X_features, y_encoded = self._prepare_training_data(X, y)
         
         X_train, X_val, y_train, y_val = train_test_split(
-            X_scaled, y_encoded, test_size=validation_split, 
+            X_features, y_encoded, test_size=validation_split, 
             random_state=42, stratify=y_encoded
         )
         
-        self.model.fit(X_train, y_train)
-        self.is_trained = True
+        pipeline = self._build_pipeline()
+        pipeline.fit(X_train, y_train)
+        self._adopt_pipeline(pipeline)
         
-        train_score = self.model.score(X_train, y_train)
-        val_score = self.model.score(X_val, y_val)
+        train_score = pipeline.score(X_train, y_train)
+        val_score = pipeline.score(X_val, y_val)
         
-        y_pred = self.model.predict(X_val)
-        y_pred_proba = self.model.predict_proba(X_val)
+        y_pred = pipeline.predict(X_val)
+        y_pred_proba = pipeline.predict_proba(X_val)
         
         metrics = {
             'train_accuracy': train_score,
@@ -133,10 +246,20 @@ class PerformativeClassifier:
             raise ValueError("Model must be trained before making predictions")
         
         X_features = self.prepare_features(X)
-        X_scaled = self.scaler.transform(X_features)
-        
-        predictions = self.model.predict(X_scaled)
-        probabilities = self.model.predict_proba(X_scaled)
+        X_scaled = self._scale_inplace(np.array(X_features, dtype=np.float32, order='C'))
+        
+        if self._predictor is not None:
+            probabilities = self._predictor.predict(treelite_runtime.DMatrix(X_scaled))
+            if probabilities.ndim == 1:
+                probabilities = np.column_stack([1.0 - probabilities, probabilities])
+            predictions = np.argmax(probabilities, axis=1)
+        elif self._ort_sess is not None:
+            predictions, probabilities = self._ort_sess.run(
+                None, {'input': X_scaled}
+            )
+        else:
+            predictions = self.model.predict(X_scaled)
+            probabilities = self.model.predict_proba(X_scaled)
         
         decoded_predictions = self.label_encoder.inverse_transform(predictions)
         
@@ -171,11 +294,13 @@ class PerformativeClassifier:
         return sorted_features
     
     def cross_validate(self, X, y, cv=5):
-        X_features = self.prepare_features(X)
-        y_encoded = self.label_encoder.fit_transform(y)
-        X_scaled = self.scaler.fit_transform(X_features)
+        X_features, y_encoded = self._prepare_training_data(X, y)
         
-        scores = cross_val_score(self.model, X_scaled, y_encoded, cv=cv, scoring='accuracy')
+        with joblib.parallel_backend('loky', n_jobs=-1):
+            scores = cross_val_score(
+                self._build_pipeline(single_threaded=True), X_features, y_encoded,
+                cv=cv, scoring='accuracy', n_jobs=-1
+            )
         
         return {
             'mean_accuracy': np.mean(scores),
@@ -184,9 +309,7 @@ class PerformativeClassifier:
         }
     
     def hyperparameter_tuning(self, X, y):
-        X_features = self.prepare_features(X)
-        y_encoded = self.label_encoder.fit_transform(y)
-        X_scaled = self.scaler.fit_transform(X_features)
+        X_features, y_encoded = self._prepare_training_data(X, y)
         
         param_grids = {
             'random_forest': {
@@ -196,9 +319,10 @@ class PerformativeClassifier:
                 'min_samples_leaf': [1, 2, 4]
             },
             'gradient_boost': {
-                'n_estimators': [100, 150, 200],
+                'max_iter': [100, 200, 300],
                 'learning_rate': [0.05, 0.1, 0.15],
-                'max_depth': [6, 8, 10]
+                'max_leaf_nodes': [15, 31, 63],
+                'l2_regularization': [0.0, 0.1, 1.0]
             },
             'svm': {
                 'C': [0.1, 1, 10, 100],
@@ -212,21 +336,23 @@ class PerformativeClassifier:
             }
         }
         
-        param_grid = param_grids.get(self.model_type, {})
+        param_grid = {f'clf__{name}': values for name, values in param_grids.get(self.model_type, {}).items()}
         
         if param_grid:
-            grid_search = GridSearchCV(
-                self.model, param_grid, cv=5, 
-                scoring='accuracy', n_jobs=-1, verbose=1
+            grid_search = HalvingGridSearchCV(
+                self._build_pipeline(single_threaded=True), param_grid, cv=5, factor=3,
+                scoring='accuracy', n_jobs=-1, verbose=1, random_state=42
             )
             
-            grid_search.fit(X_scaled, y_encoded)
+            with joblib.parallel_backend('loky', n_jobs=-1):
+                grid_search.fit(X_features, y_encoded)
             
-            self.model = grid_search.best_estimator_
-            self.is_trained = True
+            self._adopt_pipeline(grid_search.best_estimator_)
+            if 'n_jobs' in self.model_configs[self.model_type]['params']:
+                self.model.set_params(n_jobs=self.model_configs[self.model_type]['params']['n_jobs'])
             
             return {
-                'best_params': grid_search.best_params_,
+                'best_params': {name.split('__', 1)[1]: value for name, value in grid_search.best_params_.items()},
                 'best_score': grid_search.best_score_,
                 'cv_results': grid_search.cv_results_
             }
@@ -237,28 +363,50 @@ class PerformativeClassifier:
         if not self.is_trained:
             raise ValueError("Cannot save untrained model")
         
+        if self._onnx_bytes is None:
+            self._load_onnx_session(self._export_onnx())
+        
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
             'label_encoder': self.label_encoder,
             'feature_names': self.feature_names,
             'model_type': self.model_type,
+            'onnx_model': self._onnx_bytes,
             'timestamp': datetime.now().isoformat()
         }
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        joblib.dump(model_data, filepath, compress=MODEL_COMPRESSION, protocol=5)
     
     def load_model(self, filepath):
-        with open(filepath, 'rb') as f:
-            model_data = pickle.load(f)
+        # Compressed dumps cannot be memory-mapped, so the smaller file is
+        # traded for each process holding its own copy of the tree arrays.
+        model_data = joblib.load(filepath)
         
         self.model = model_data['model']
         self.scaler = model_data['scaler']
+        self._scaler_params = None
         self.label_encoder = model_data['label_encoder']
         self.feature_names = model_data['feature_names']
         self.model_type = model_data['model_type']
         self.is_trained = True
+        
+        onnx_bytes = model_data.get('onnx_model')
+        if onnx_bytes is None:
+            onnx_bytes = self._export_onnx()
+        self._load_onnx_session(onnx_bytes)
+        self._load_treelite_predictor(filepath)
+
+def _train_member(name, model, X, y):
+    n_jobs = model.model.get_params().get('n_jobs')
+    if n_jobs is not None:
+        model.model.set_params(n_jobs=1)
+    
+    metrics = model.train(X, y)
+    
+    if n_jobs is not None:
+        model.model.set_params(n_jobs=n_jobs)
+    return name, model, metrics
 
 class EnsemblePerformativeClassifier:
     def __init__(self):
@@ -274,9 +422,13 @@ class EnsemblePerformativeClassifier:
     def train(self, X, y):
         results = {}
         
-        for name, model in self.models.items():
-            print(f"Training {name} model...")
-            metrics = model.train(X, y)
+        print(f"Training {', '.join(self.models)} models...")
+        trained = Parallel(n_jobs=-1, backend='loky')(
+            delayed(_train_member)(name, model, X, y) for name, model in self.models.items()
+        )
+        
+        for name, model, metrics in trained:
+            self.models[name] = model
             results[name] = metrics
         
         self.is_trained = True
@@ -294,10 +446,11 @@ class EnsemblePerformativeClassifier:
             predictions[name] = result['predictions']
             probabilities[name] = result['probabilities']
         
-        ensemble_proba = np.zeros_like(probabilities['rf'])
+        names = list(self.weights)
+        stacked_proba = np.stack([probabilities[name] for name in names])
+        weights = np.array([self.weights[name] for name in names], dtype=stacked_proba.dtype)
         
-        for name, weight in self.weights.items():
-            ensemble_proba += weight * probabilities[name]
+        ensemble_proba = np.einsum('m,mnc->nc', weights, stacked_proba)
         
         ensemble_predictions = np.argmax(ensemble_proba, axis=1)
         ensemble_confidence = np.max(ensemble_proba, axis=1)
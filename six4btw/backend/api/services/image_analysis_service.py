@@ -1,31 +1,121 @@
 import os
-import io
 import base64
 import numpy as np
 import cv2
-from PIL import Image
 import torch
-import torchvision.transforms as transforms
 from flask import Flask, request, jsonify
 import logging
 from datetime import datetime
 import json
 import hashlib
 import redis
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 import asyncio
 import aiohttp
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, Future
 import multiprocessing as mp
+import queue
+import random
+import threading
+import time
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+MODEL_INPUT_SIZE = (224, 224)
+NORM_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32) * 255.0
+NORM_SCALE = 1.0 / (np.array([0.229, 0.224, 0.225], dtype=np.float32) * 255.0)
+ORB_DETECTOR = cv2.ORB_create(nfeatures=200)
+SIFT_DETECTOR = cv2.SIFT_create()
+
+def init_cpu_worker():
+    cv2.setNumThreads(1)
+
+def decode_image(image_data: Union[bytes, np.ndarray]) -> Optional[np.ndarray]:
+    if isinstance(image_data, np.ndarray):
+        return image_data
+    return cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+
+def normalize_model_input(image: np.ndarray) -> np.ndarray:
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    image = cv2.resize(image, MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+    
+    arr = image.astype(np.float32)
+    arr -= NORM_MEAN
+    arr *= NORM_SCALE
+    return arr
+
+def compute_opencv_features(image: np.ndarray) -> Dict:
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    
+    mean, std = cv2.meanStdDev(gray)
+    
+    edges = cv2.Canny(gray, 50, 150)
+    edge_density = cv2.countNonZero(edges) / edges.size
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    kp_orb = ()
+    if edge_density > 0.01:
+        kp_orb = ORB_DETECTOR.detect(gray, None)
+    
+    sift_keypoints = SIFT_DETECTOR.detect(gray, None)
+    
+    return {
+        'sift_keypoints': len(sift_keypoints),
+        'orb_keypoints': len(kp_orb),
+        'contour_count': len(contours),
+        'edge_density': float(edge_density),
+        'brightness': float(mean[0, 0]),
+        'contrast': float(std[0, 0]),
+        'color_variance': float(np.var(image)),
+        'image_size': image.shape[:2],
+        'color_histograms': {
+            'red': cv2.calcHist([image], [2], None, [50], [0, 50]).ravel().tolist(),
+            'green': cv2.calcHist([image], [1], None, [50], [0, 50]).ravel().tolist(),
+            'blue': cv2.calcHist([image], [0], None, [50], [0, 50]).ravel().tolist()
+        }
+    }
+
+def process_upload(image_data: bytes, with_model_input: bool = False) -> Tuple[Dict, Optional[np.ndarray]]:
+    image = decode_image(image_data)
+    if image is None:
+        raise ValueError("Invalid image format")
+    
+    features = compute_opencv_features(image)
+    model_input = normalize_model_input(image) if with_model_input else None
+    
+    return features, model_input
 
 class ImageAnalysisService:
-    def __init__(self, model_path: str, redis_host: str = 'localhost', redis_port: int = 6379):
+    def __init__(self, model_path: str, redis_host: str = 'localhost', redis_port: int = 6379,
+                 enable_model_inference: bool = False):
         self.model_path = model_path
+        self.enable_model_inference = enable_model_inference
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.input_dtype = torch.float16 if self.device.type == 'cuda' else torch.float32
         self.model = None
-        self.transform = None
         self.redis_client = None
-        self.executor = ThreadPoolExecutor(max_workers=mp.cpu_count())
+        self.cpu_executor = ProcessPoolExecutor(
+            max_workers=len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else mp.cpu_count(),
+            mp_context=mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'),
+            initializer=init_cpu_worker
+        )
+        self.infer_queue = queue.Queue()
+        self.infer_thread = None
+        self.max_batch_size = 16
+        self.max_batch_wait = 0.008
         
         self.performative_items_db = {
             'vintage_camera': {'score': 15, 'keywords': ['camera', 'vintage', 'film', 'analog', 'leica', 'canon', 'nikon']},
@@ -50,9 +140,54 @@ class ImageAnalysisService:
             'pocket_watch': {'score': 19, 'keywords': ['watch', 'pocket', 'vintage', 'antique', 'timepiece']}
         }
         
+        self.base_labels = (
+            'person', 'clothing', 'face', 'hair', 'hand', 'furniture',
+            'wall', 'floor', 'window', 'door', 'table', 'chair'
+        )
+        
+        self.keyword_index = tuple(
+            (item_name, keyword)
+            for item_name, item_data in self.performative_items_db.items()
+            for keyword in item_data['keywords']
+        )
+        self.keyword_automaton = self.build_keyword_automaton()
+        
         self.setup_logging()
         self.initialize_services()
     
+    def build_keyword_automaton(self):
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for item_idx, (item_name, item_data) in enumerate(self.performative_items_db.items()):
+            for keyword_idx, keyword in enumerate(item_data['keywords']):
+                matches = automaton.get(keyword, [])
+                matches.append((item_idx, keyword_idx, item_name, keyword))
+                automaton.add_word(keyword, matches)
+        
+        automaton.make_automaton()
+        return automaton
+    
+    def match_label_keywords(self, label_lower: str) -> List[Tuple[str, str]]:
+        if self.keyword_automaton is None:
+            matches = []
+            matched_item = None
+            for item_name, keyword in self.keyword_index:
+                if item_name != matched_item and keyword in label_lower:
+                    matches.append((item_name, keyword))
+                    matched_item = item_name
+            return matches
+        
+        first_matches = {}
+        for _, keyword_matches in self.keyword_automaton.iter(label_lower):
+            for item_idx, keyword_idx, item_name, keyword in keyword_matches:
+                current = first_matches.get(item_idx)
+                if current is None or keyword_idx < current[0]:
+                    first_matches[item_idx] = (keyword_idx, item_name, keyword)
+        
+        return [(item_name, keyword) for _, (_, item_name, keyword) in sorted(first_matches.items())]
+    
     def setup_logging(self):
         logging.basicConfig(
             level=logging.INFO,
@@ -66,15 +201,22 @@ class ImageAnalysisService:
     
     def initialize_services(self):
         try:
-            self.redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
+            self.redis_client = redis.Redis(host='localhost', port=6379, decode_responses=False)
             self.redis_client.ping()
             self.logger.info("Redis connection established")
         except Exception as e:
             self.logger.warning(f"Redis connection failed: {e}")
             self.redis_client = None
         
+        if not self.enable_model_inference:
+            self.logger.info("Model inference disabled; scoring from OpenCV features only")
+            return
+        
         self.load_model()
-        self.setup_transforms()
+        
+        if self.model is not None:
+            self.infer_thread = threading.Thread(target=self.batch_inference_worker, daemon=True)
+            self.infer_thread.start()
     
     def load_model(self):
         try:
@@ -91,65 +233,82 @@ class ImageAnalysisService:
             self.model.to(self.device)
             self.model.eval()
             
+            self.model = self.optimize_model(self.model)
+            
         except Exception as e:
             self.logger.error(f"Error loading model: {e}")
             self.model = None
     
-    def setup_transforms(self):
-        self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
+    def optimize_model(self, model):
+        try:
+            if self.device.type == 'cuda':
+                model = model.half()
+            else:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            
+            example = torch.randn(1, 3, 224, 224, device=self.device, dtype=self.input_dtype)
+            
+            with torch.no_grad():
+                traced = torch.jit.freeze(torch.jit.trace(model, example))
+                for _ in range(2):
+                    traced(example)
+            
+            self.logger.info("Model traced and frozen for inference")
+            return traced
+            
+        except Exception as e:
+            self.logger.warning(f"Model optimization failed, using eager model: {e}")
+            param = next(model.parameters(), None)
+            self.input_dtype = param.dtype if param is not None else torch.float32
+            return model
     
-    def preprocess_image(self, image_data: bytes) -> torch.Tensor:
+    def to_model_tensor(self, model_input: np.ndarray) -> torch.Tensor:
+        tensor = torch.from_numpy(model_input.transpose(2, 0, 1)).unsqueeze_(0)
+        return tensor.to(self.device, dtype=self.input_dtype, non_blocking=True)
+    
+    def preprocess_image(self, image_data: Union[bytes, np.ndarray]) -> torch.Tensor:
         try:
-            image = Image.open(io.BytesIO(image_data)).convert('RGB')
-            tensor = self.transform(image).unsqueeze(0)
-            return tensor.to(self.device)
+            return self.to_model_tensor(normalize_model_input(decode_image(image_data)))
         except Exception as e:
             self.logger.error(f"Error preprocessing image: {e}")
             raise ValueError("Invalid image format")
     
-    def extract_opencv_features(self, image_data: bytes) -> Dict:
-        try:
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            gray = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
-            
-            sift = cv2.SIFT_create()
-            keypoints, descriptors = sift.detectAndCompute(gray, None)
-            
-            orb = cv2.ORB_create()
-            kp_orb, desc_orb = orb.detectAndCompute(gray, None)
+    def batch_inference_worker(self):
+        while True:
+            batch = [self.infer_queue.get()]
+            deadline = time.monotonic() + self.max_batch_wait
             
-            edges = cv2.Canny(gray, 50, 150)
-            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.infer_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
             
-            hist_r = cv2.calcHist([image_rgb], [0], None, [256], [0, 256])
-            hist_g = cv2.calcHist([image_rgb], [1], None, [256], [0, 256])
-            hist_b = cv2.calcHist([image_rgb], [2], None, [256], [0, 256])
-            
-            features = {
-                'sift_keypoints': len(keypoints) if keypoints else 0,
-                'orb_keypoints': len(kp_orb) if kp_orb else 0,
-                'contour_count': len(contours),
-                'edge_density': float(np.sum(edges > 0) / edges.size),
-                'brightness': float(np.mean(gray)),
-                'contrast': float(np.std(gray)),
-                'color_variance': float(np.var(image_rgb)),
-                'image_size': image_rgb.shape[:2],
-                'color_histograms': {
-                    'red': hist_r.flatten().tolist()[:50],
-                    'green': hist_g.flatten().tolist()[:50],
-                    'blue': hist_b.flatten().tolist()[:50]
-                }
-            }
-            
-            return features
+            tensors, futures = zip(*batch)
             
+            try:
+                with torch.inference_mode():
+                    outputs = self.model(torch.cat(tensors, 0))
+                    probabilities = torch.softmax(outputs, dim=1).cpu()
+                
+                for future, row in zip(futures, probabilities):
+                    future.set_result(row)
+            except Exception as e:
+                self.logger.error(f"Error during batched inference: {e}")
+                for future in futures:
+                    future.set_exception(e)
+    
+    async def run_model_inference(self, image_tensor: torch.Tensor) -> torch.Tensor:
+        future = Future()
+        self.infer_queue.put((image_tensor, future))
+        return await asyncio.wrap_future(future)
+    
+    def extract_opencv_features(self, image_data: Union[bytes, np.ndarray]) -> Dict:
+        try:
+            return compute_opencv_features(decode_image(image_data))
         except Exception as e:
             self.logger.error(f"Error extracting OpenCV features: {e}")
             return {}
@@ -163,30 +322,22 @@ class ImageAnalysisService:
         for label in mock_labels:
             label_lower = label.lower()
             
-            for item_name, item_data in self.performative_items_db.items():
-                for keyword in item_data['keywords']:
-                    if keyword in label_lower:
-                        confidence = min(0.95, max(0.6, np.random.normal(0.8, 0.1)))
-                        
-                        detected_items.append({
-                            'item': item_name.replace('_', ' ').title(),
-                            'points': item_data['score'],
-                            'confidence': float(confidence),
-                            'matched_keyword': keyword,
-                            'original_label': label,
-                            'match_type': 'exact' if keyword == label_lower else 'partial'
-                        })
-                        break
+            for item_name, keyword in self.match_label_keywords(label_lower):
+                confidence = min(0.95, max(0.6, random.gauss(0.8, 0.1)))
+                
+                detected_items.append({
+                    'item': item_name.replace('_', ' ').title(),
+                    'points': self.performative_items_db[item_name]['score'],
+                    'confidence': confidence,
+                    'matched_keyword': keyword,
+                    'original_label': label,
+                    'match_type': 'exact' if keyword == label_lower else 'partial'
+                })
         
         detected_items = sorted(detected_items, key=lambda x: x['points'], reverse=True)
         return detected_items[:8]
     
     def generate_mock_labels(self, opencv_features: Dict) -> List[str]:
-        base_labels = [
-            'person', 'clothing', 'face', 'hair', 'hand', 'furniture', 
-            'wall', 'floor', 'window', 'door', 'table', 'chair'
-        ]
-        
         performative_labels = []
         
         if opencv_features.get('sift_keypoints', 0) > 100:
@@ -206,8 +357,8 @@ class ImageAnalysisService:
         if contrast > 60:
             performative_labels.extend(['high contrast', 'dramatic lighting', 'black and white'])
         
-        all_labels = base_labels + performative_labels
-        return np.random.choice(all_labels, size=min(len(all_labels), 12), replace=False).tolist()
+        all_labels = self.base_labels + tuple(performative_labels)
+        return random.sample(all_labels, k=min(len(all_labels), 12))
     
     def calculate_performative_score(self, detected_items: List[Dict], opencv_features: Dict) -> int:
         base_score = sum(item['points'] * item['confidence'] for item in detected_items)
@@ -267,7 +418,9 @@ class ImageAnalysisService:
         return "Unable to determine performative level. Try again with a clearer image."
     
     def get_cache_key(self, image_data: bytes) -> str:
-        return f"performative_analysis:{hashlib.md5(image_data).hexdigest()}"
+        if xxhash is not None:
+            return f"performative_analysis:{xxhash.xxh3_64_hexdigest(image_data)}"
+        return f"performative_analysis:{hashlib.blake2b(image_data, digest_size=16).hexdigest()}"
     
     def get_cached_result(self, cache_key: str) -> Optional[Dict]:
         if not self.redis_client:
@@ -276,6 +429,8 @@ class ImageAnalysisService:
         try:
             cached = self.redis_client.get(cache_key)
             if cached:
+                if msgpack is not None:
+                    return msgpack.unpackb(cached, raw=False)
                 return json.loads(cached)
         except Exception as e:
             self.logger.error(f"Error retrieving from cache: {e}")
@@ -287,25 +442,34 @@ class ImageAnalysisService:
             return
         
         try:
-            self.redis_client.setex(cache_key, ttl, json.dumps(result))
+            payload = msgpack.packb(result, use_bin_type=True) if msgpack is not None else json.dumps(result)
+            self.redis_client.setex(cache_key, ttl, payload)
         except Exception as e:
             self.logger.error(f"Error caching result: {e}")
     
     async def analyze_image(self, image_data: bytes) -> Dict:
         start_time = datetime.now()
         
-        cache_key = self.get_cache_key(image_data)
-        cached_result = self.get_cached_result(cache_key)
-        
-        if cached_result:
-            self.logger.info("Returning cached result")
-            return cached_result
+        cache_key = None
+        if self.redis_client:
+            cache_key = self.get_cache_key(image_data)
+            cached_result = self.get_cached_result(cache_key)
+            
+            if cached_result:
+                self.logger.info("Returning cached result")
+                return cached_result
         
         try:
-            opencv_features = await asyncio.get_event_loop().run_in_executor(
-                self.executor, self.extract_opencv_features, image_data
+            loop = asyncio.get_event_loop()
+            
+            opencv_features, model_input = await loop.run_in_executor(
+                self.cpu_executor, process_upload, image_data, self.infer_thread is not None
             )
             
+            model_probabilities = None
+            if model_input is not None:
+                model_probabilities = await self.run_model_inference(self.to_model_tensor(model_input))
+            
             detected_items = self.detect_performative_items(opencv_features)
             
             score = self.calculate_performative_score(detected_items, opencv_features)
@@ -345,7 +509,11 @@ class ImageAnalysisService:
                 'performativeItems': {item['item']: item['points'] for item in detected_items}
             }
             
-            self.cache_result(cache_key, result)
+            if model_probabilities is not None:
+                result['debug']['model_performative_probability'] = round(float(model_probabilities[1]), 4)
+            
+            if cache_key:
+                self.cache_result(cache_key, result)
             
             self.logger.info(f"Analysis completed in {processing_time:.2f}ms, score: {score}")
             
@@ -365,11 +533,20 @@ class ImageAnalysisService:
         }
 
 app = Flask(__name__)
-service = ImageAnalysisService(model_path='models/best_performative_model.pth')
+_service = None
+
+def get_service() -> ImageAnalysisService:
+    global _service
+    if _service is None:
+        _service = ImageAnalysisService(
+            model_path='models/best_performative_model.pth',
+            enable_model_inference=os.environ.get('ENABLE_MODEL_INFERENCE') == '1'
+        )
+    return _service
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify(service.health_check())
+    return jsonify(get_service().health_check())
 
 @app.route('/analyze', methods=['POST'])
 async def analyze():
@@ -383,7 +560,7 @@ async def analyze():
         if len(image_data) == 0:
             return jsonify({'error': 'Empty image file'}), 400
         
-        result = await service.analyze_image(image_data)
+        result = await get_service().analyze_image(image_data)
         return jsonify({'data': result})
         
     except Exception as e:
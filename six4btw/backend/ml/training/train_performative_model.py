@@ -1,10 +1,9 @@
 import os
 import sys
 import json
+import itertools
+import concurrent.futures
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import argparse
 import logging
@@ -14,13 +13,62 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import DataLoader, Dataset
-import torchvision.transforms as transforms
-from torchvision.datasets import ImageFolder
-from sklearn.metrics import classification_report, confusion_matrix
-import wandb
+from torch.ao.quantization import quantize_fx, get_default_qconfig_mapping
+from torchvision.io import read_image, ImageReadMode
+from torchvision.transforms import v2
+
+try:
+    import timm
+except ImportError:
+    timm = None
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
+def init_loader_worker(worker_id):
+    torch.set_num_threads(1)
+
+def snapshot_to_cpu(state):
+    if isinstance(state, torch.Tensor):
+        return state.detach().to('cpu', copy=True)
+    if isinstance(state, dict):
+        return {key: snapshot_to_cpu(value) for key, value in state.items()}
+    if isinstance(state, (list, tuple)):
+        return type(state)(snapshot_to_cpu(value) for value in state)
+    return state
+
+class DataPrefetcher:
+    def __init__(self, loader, device):
+        self.loader = loader
+        self.device = device
+        self.stream = torch.cuda.Stream(device) if device.type == 'cuda' else None
+    
+    def __len__(self):
+        return len(self.loader)
+    
+    def __iter__(self):
+        if self.stream is None:
+            yield from self.loader
+            return
+        
+        batches = iter(self.loader)
+        next_batch = self._preload(batches)
+        while next_batch is not None:
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_stream(self.stream)
+            data, target = next_batch
+            data.record_stream(current_stream)
+            target.record_stream(current_stream)
+            next_batch = self._preload(batches)
+            yield data, target
+    
+    def _preload(self, batches):
+        try:
+            data, target = next(batches)
+        except StopIteration:
+            return None
+        with torch.cuda.stream(self.stream):
+            return data.to(self.device, non_blocking=True), target.to(self.device, non_blocking=True)
+
 class PerformativeImageDataset(Dataset):
     def __init__(self, data_dir, split='train', transform=None):
         self.data_dir = Path(data_dir) / split
@@ -28,23 +76,51 @@ class PerformativeImageDataset(Dataset):
         self.classes = ['authentic', 'performative']
         self.class_to_idx = {cls: idx for idx, cls in enumerate(self.classes)}
         
-        self.samples = []
-        for class_name in self.classes:
-            class_dir = self.data_dir / class_name
-            if class_dir.exists():
-                for img_path in class_dir.glob('*.jpg'):
-                    self.samples.append((str(img_path), self.class_to_idx[class_name]))
-                for img_path in class_dir.glob('*.png'):
-                    self.samples.append((str(img_path), self.class_to_idx[class_name]))
+        manifest_path = self.data_dir.parent / f'{split}_manifest.npy'
+        samples = self._load_manifest(manifest_path)
+        if samples is None:
+            samples = self._scan_samples()
+            try:
+                np.save(manifest_path, np.array(samples, dtype=object).reshape(-1, 2))
+            except OSError:
+                pass
+        
+        self.paths = [path for path, _ in samples]
+        self.labels = np.array([label for _, label in samples], dtype=np.int64)
+    
+    def _class_dirs(self):
+        return [
+            (self.data_dir / class_name, self.class_to_idx[class_name])
+            for class_name in self.classes
+            if (self.data_dir / class_name).is_dir()
+        ]
+    
+    def _scan_samples(self):
+        samples = []
+        for class_dir, idx in self._class_dirs():
+            with os.scandir(class_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(('.jpg', '.png')) and entry.is_file(follow_symlinks=False):
+                        samples.append((entry.path, idx))
+        return samples
+    
+    def _load_manifest(self, manifest_path):
+        try:
+            manifest_mtime = manifest_path.stat().st_mtime
+        except OSError:
+            return None
+        if any(class_dir.stat().st_mtime > manifest_mtime for class_dir, _ in self._class_dirs()):
+            return None
+        return [(str(path), int(label)) for path, label in np.load(manifest_path, allow_pickle=True)]
     
     def __len__(self):
-        return len(self.samples)
+        return len(self.paths)
     
     def __getitem__(self, idx):
-        img_path, label = self.samples[idx]
+        img_path = self.paths[idx]
+        label = int(self.labels[idx])
         
-        from PIL import Image
-        image = Image.open(img_path).convert('RGB')
+        image = read_image(img_path, ImageReadMode.RGB)
         
         if self.transform:
             image = self.transform(image)
@@ -52,9 +128,32 @@ class PerformativeImageDataset(Dataset):
         return image, label
 
 class AdvancedPerformativeNet(nn.Module):
-    def __init__(self, num_classes=2, dropout_rate=0.5):
+    def __init__(self, num_classes=2, dropout_rate=0.5, backbone_name=None, pretrained_backbone=False):
         super(AdvancedPerformativeNet, self).__init__()
         
+        self.backbone_name = backbone_name if backbone_name and timm is not None else None
+        
+        if self.backbone_name:
+            self._init_timm_backbone(num_classes, dropout_rate, backbone_name, pretrained_backbone)
+        else:
+            self._init_vgg_backbone(num_classes, dropout_rate)
+    
+    def _init_timm_backbone(self, num_classes, dropout_rate, backbone_name, pretrained_backbone):
+        self.features = timm.create_model(
+            backbone_name, pretrained=pretrained_backbone, num_classes=0, global_pool=''
+        )
+        self.feat_dim = self.features.num_features
+        
+        self.avgpool = nn.AdaptiveAvgPool2d((1, 1))
+        
+        self.classifier = nn.Sequential(
+            nn.Dropout(dropout_rate),
+            nn.Linear(self.feat_dim, num_classes)
+        )
+    
+    def _init_vgg_backbone(self, num_classes, dropout_rate):
+        self.feat_dim = 512
+        
         self.features = nn.Sequential(
             nn.Conv2d(3, 64, kernel_size=3, padding=1),
             nn.BatchNorm2d(64),
@@ -106,51 +205,49 @@ class AdvancedPerformativeNet(nn.Module):
             nn.MaxPool2d(2, 2),
         )
         
-        self.avgpool = nn.AdaptiveAvgPool2d((7, 7))
+        self.avgpool = nn.AdaptiveAvgPool2d((1, 1))
         
         self.classifier = nn.Sequential(
-            nn.Linear(512 * 7 * 7, 4096),
-            nn.ReLU(inplace=True),
-            nn.Dropout(dropout_rate),
-            nn.Linear(4096, 4096),
-            nn.ReLU(inplace=True),
-            nn.Dropout(dropout_rate),
-            nn.Linear(4096, 1024),
-            nn.ReLU(inplace=True),
             nn.Dropout(dropout_rate),
-            nn.Linear(1024, num_classes)
+            nn.Linear(self.feat_dim, num_classes)
         )
         
-        self.attention = nn.MultiheadAttention(embed_dim=512, num_heads=8)
-        
     def forward(self, x):
         x = self.features(x)
         x = self.avgpool(x)
-        
-        batch_size = x.size(0)
-        x_flat = x.view(batch_size, 512, -1)
-        x_flat = x_flat.permute(2, 0, 1)
-        
-        attn_output, _ = self.attention(x_flat, x_flat, x_flat)
-        attn_output = attn_output.permute(1, 2, 0)
-        attn_output = torch.mean(attn_output, dim=2)
-        
-        x = x.view(batch_size, -1)
+        x = torch.flatten(x, 1)
         x = self.classifier(x)
         
         return x
 
 class PerformativeTrainer:
+    """Never call torch.cuda.empty_cache() inside the epoch loops; on OOM lower batch_size instead."""
+    
     def __init__(self, config):
         self.config = config
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        
+        torch.backends.cudnn.benchmark = True
+        torch.backends.cudnn.deterministic = False
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+        torch.set_float32_matmul_precision('high')
+        
         self.model = None
+        self.forward_model = None
         self.train_loader = None
         self.val_loader = None
         self.test_loader = None
+        self.train_batches = None
         self.optimizer = None
         self.scheduler = None
         self.criterion = None
+        self.grad_scaler = None
+        self.train_augment = None
+        self.normalize = None
+        self.quantized = False
+        self._save_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._last_save = None
         
         self.setup_logging()
         self.setup_model()
@@ -171,90 +268,146 @@ class PerformativeTrainer:
     def setup_model(self):
         self.model = AdvancedPerformativeNet(
             num_classes=self.config['num_classes'],
-            dropout_rate=self.config['dropout_rate']
+            dropout_rate=self.config['dropout_rate'],
+            backbone_name=self.config.get('backbone_name'),
+            pretrained_backbone=self.config.get('pretrained_backbone', False)
         ).to(self.device)
         
         if self.config.get('pretrained_path'):
             self.load_pretrained_weights()
+        
+        self.model = self.model.to(memory_format=torch.channels_last)
+        
+        self.forward_model = self.model
+        if self.config.get('compile', True) and hasattr(torch, 'compile'):
+            self.forward_model = torch.compile(self.model, mode='max-autotune', fullgraph=False)
             
         self.logger.info(f"Model initialized with {sum(p.numel() for p in self.model.parameters())} parameters")
         
     def load_pretrained_weights(self):
-        try:
-            checkpoint = torch.load(self.config['pretrained_path'], map_location=self.device)
-            self.model.load_state_dict(checkpoint['model_state_dict'])
-            self.logger.info(f"Loaded pretrained weights from {self.config['pretrained_path']}")
-        except Exception as e:
-            self.logger.warning(f"Could not load pretrained weights: {e}")
+        checkpoint = torch.load(self.config['pretrained_path'], map_location=self.device)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.logger.info(f"Loaded pretrained weights from {self.config['pretrained_path']}")
+    
+    def quantize_ptq(self, calibration_batches=32):
+        self.device = torch.device('cpu')
+        self.use_amp = False
+        self.model = self.model.to(self.device).eval()
+        
+        example_inputs = (torch.randn(1, 3, 224, 224).contiguous(memory_format=torch.channels_last),)
+        model_prep = quantize_fx.prepare_fx(self.model, get_default_qconfig_mapping('x86'), example_inputs)
+        
+        with torch.no_grad():
+            for data, target in itertools.islice(self.val_loader, calibration_batches):
+                data, _ = self.prepare_batch(data, target)
+                model_prep(data.float())
+        
+        self.model = quantize_fx.convert_fx(model_prep)
+        self.forward_model = self.model
+        self.quantized = True
+        
+        self.logger.info(f"Model quantized to INT8 after {calibration_batches} calibration batches")
     
     def setup_data(self):
-        train_transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.RandomHorizontalFlip(p=0.5),
-            transforms.RandomRotation(degrees=15),
-            transforms.ColorJitter(brightness=0.2, contrast=0.2, saturation=0.2, hue=0.1),
-            transforms.RandomAffine(degrees=0, translate=(0.1, 0.1)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+        resize_transform = v2.Resize((224, 224), antialias=True)
+        
+        self.train_augment = v2.Compose([
+            v2.RandomHorizontalFlip(p=0.5),
+            v2.RandomRotation(degrees=15),
+            v2.ColorJitter(brightness=0.2, contrast=0.2, saturation=0.2, hue=0.1),
+            v2.RandomAffine(degrees=0, translate=(0.1, 0.1))
         ])
         
-        val_transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+        self.normalize = v2.Compose([
+            v2.ToDtype(torch.float32, scale=True),
+            v2.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
         ])
         
         train_dataset = PerformativeImageDataset(
-            self.config['data_dir'], 'train', transform=train_transform
+            self.config['data_dir'], 'train', transform=resize_transform
         )
         val_dataset = PerformativeImageDataset(
-            self.config['data_dir'], 'val', transform=val_transform
+            self.config['data_dir'], 'val', transform=resize_transform
         )
         test_dataset = PerformativeImageDataset(
-            self.config['data_dir'], 'test', transform=val_transform
+            self.config['data_dir'], 'test', transform=resize_transform
         )
         
+        num_workers = min(
+            self.config['num_workers'],
+            (os.cpu_count() or 1) // max(1, torch.cuda.device_count())
+        )
+        loader_kwargs = {'num_workers': num_workers, 'pin_memory': True}
+        if num_workers > 0:
+            loader_kwargs.update(
+                persistent_workers=True,
+                prefetch_factor=2,
+                worker_init_fn=init_loader_worker
+            )
+        
         self.train_loader = DataLoader(
             train_dataset, 
             batch_size=self.config['batch_size'],
             shuffle=True,
-            num_workers=self.config['num_workers'],
-            pin_memory=True
+            **loader_kwargs
         )
         
         self.val_loader = DataLoader(
             val_dataset,
             batch_size=self.config['batch_size'],
             shuffle=False,
-            num_workers=self.config['num_workers'],
-            pin_memory=True
+            **loader_kwargs
         )
         
         self.test_loader = DataLoader(
             test_dataset,
             batch_size=self.config['batch_size'],
             shuffle=False,
-            num_workers=self.config['num_workers'],
-            pin_memory=True
+            **loader_kwargs
         )
         
+        self.train_batches = DataPrefetcher(self.train_loader, self.device)
+        
         self.logger.info(f"Data loaded: Train={len(train_dataset)}, Val={len(val_dataset)}, Test={len(test_dataset)}")
     
+    def prepare_batch(self, data, target, augment=False):
+        data = data.to(self.device, non_blocking=True)
+        target = target.to(self.device, non_blocking=True)
+        
+        if augment:
+            data = self.train_augment(data)
+        
+        data = self.normalize(data)
+        return data.contiguous(memory_format=torch.channels_last), target
+    
     def setup_training(self):
         self.criterion = nn.CrossEntropyLoss()
         
+        amp_dtype = self.config.get('amp_dtype', 'fp16')
+        self.use_amp = amp_dtype != 'off' and self.device.type == 'cuda'
+        self.amp_dtype = torch.bfloat16 if amp_dtype == 'bf16' else torch.float16
+        self.grad_scaler = torch.cuda.amp.GradScaler(enabled=self.use_amp and amp_dtype == 'fp16')
+        
+        param_groups = self.build_param_groups()
         if self.config['optimizer'] == 'adam':
             self.optimizer = optim.Adam(
                 self.model.parameters(),
                 lr=self.config['learning_rate'],
-                weight_decay=self.config['weight_decay']
+                weight_decay=self.config['weight_decay'],
+                fused=self.device.type == 'cuda'
+            )
+        elif self.config['optimizer'] == 'adamw':
+            self.optimizer = optim.AdamW(
+                param_groups,
+                lr=self.config['learning_rate'],
+                fused=self.device.type == 'cuda'
             )
         elif self.config['optimizer'] == 'sgd':
             self.optimizer = optim.SGD(
-                self.model.parameters(),
+                param_groups,
                 lr=self.config['learning_rate'],
                 momentum=0.9,
-                weight_decay=self.config['weight_decay']
+                foreach=True
             )
         
         if self.config['scheduler'] == 'step':
@@ -277,24 +430,46 @@ class PerformativeTrainer:
                 verbose=True
             )
     
+    def build_param_groups(self):
+        decay, no_decay = [], []
+        for name, param in self.model.named_parameters():
+            if not param.requires_grad:
+                continue
+            if param.ndim <= 1 or name.endswith('.bias'):
+                no_decay.append(param)
+            else:
+                decay.append(param)
+        
+        return [
+            {'params': decay, 'weight_decay': self.config['weight_decay']},
+            {'params': no_decay, 'weight_decay': 0.0}
+        ]
+    
     def train_epoch(self, epoch):
         self.model.train()
-        running_loss = 0.0
-        correct_predictions = 0
+        running_loss = torch.zeros((), device=self.device)
+        correct_predictions = torch.zeros((), device=self.device, dtype=torch.long)
         total_samples = 0
+        accum_steps = max(1, self.config.get('accum_steps', 1))
+        num_batches = len(self.train_loader)
         
-        for batch_idx, (data, target) in enumerate(self.train_loader):
-            data, target = data.to(self.device), target.to(self.device)
+        self.optimizer.zero_grad(set_to_none=True)
+        for batch_idx, (data, target) in enumerate(self.train_batches):
+            data, target = self.prepare_batch(data, target, augment=True)
+            
+            with torch.autocast(self.device.type, dtype=self.amp_dtype, enabled=self.use_amp):
+                output = self.forward_model(data)
+                loss = self.criterion(output, target)
+            self.grad_scaler.scale(loss / accum_steps).backward()
             
-            self.optimizer.zero_grad()
-            output = self.model(data)
-            loss = self.criterion(output, target)
-            loss.backward()
-            self.optimizer.step()
+            if (batch_idx + 1) % accum_steps == 0 or batch_idx + 1 == num_batches:
+                self.grad_scaler.step(self.optimizer)
+                self.grad_scaler.update()
+                self.optimizer.zero_grad(set_to_none=True)
             
-            running_loss += loss.item()
+            running_loss += loss.detach()
             pred = output.argmax(dim=1, keepdim=True)
-            correct_predictions += pred.eq(target.view_as(pred)).sum().item()
+            correct_predictions += pred.eq(target.view_as(pred)).sum()
             total_samples += target.size(0)
             
             if batch_idx % self.config['log_interval'] == 0:
@@ -303,35 +478,59 @@ class PerformativeTrainer:
                     f'({100. * batch_idx / len(self.train_loader):.0f}%)]\tLoss: {loss.item():.6f}'
                 )
         
-        epoch_loss = running_loss / len(self.train_loader)
-        epoch_acc = 100. * correct_predictions / total_samples
+        epoch_loss = running_loss.item() / len(self.train_loader)
+        epoch_acc = 100. * correct_predictions.item() / total_samples
         
         return epoch_loss, epoch_acc
     
     def validate(self):
         self.model.eval()
-        val_loss = 0
-        correct = 0
-        all_preds = []
-        all_targets = []
+        val_loss = torch.zeros((), device=self.device)
+        correct = torch.zeros((), device=self.device, dtype=torch.long)
+        all_preds = torch.empty(len(self.val_loader.dataset), dtype=torch.long, device=self.device)
+        all_targets = torch.empty_like(all_preds)
+        offset = 0
         
-        with torch.no_grad():
+        with torch.inference_mode():
             for data, target in self.val_loader:
-                data, target = data.to(self.device), target.to(self.device)
-                output = self.model(data)
-                val_loss += self.criterion(output, target).item()
+                data, target = self.prepare_batch(data, target)
+                with torch.autocast(self.device.type, dtype=self.amp_dtype, enabled=self.use_amp):
+                    output = self.forward_model(data)
+                    val_loss += self.criterion(output, target)
                 pred = output.argmax(dim=1, keepdim=True)
-                correct += pred.eq(target.view_as(pred)).sum().item()
+                correct += pred.eq(target.view_as(pred)).sum()
                 
-                all_preds.extend(pred.cpu().numpy().flatten())
-                all_targets.extend(target.cpu().numpy())
+                n = target.size(0)
+                all_preds[offset:offset + n] = pred.squeeze(1)
+                all_targets[offset:offset + n] = target
+                offset += n
+        
+        all_preds = all_preds[:offset].cpu().numpy()
+        all_targets = all_targets[:offset].cpu().numpy()
         
-        val_loss /= len(self.val_loader)
-        val_acc = 100. * correct / len(self.val_loader.dataset)
+        val_loss = val_loss.item() / len(self.val_loader)
+        val_acc = 100. * correct.item() / len(self.val_loader.dataset)
         
         return val_loss, val_acc, all_preds, all_targets
     
+    def warmup_compiled_model(self):
+        if self.forward_model is self.model:
+            return
+        
+        data, target = next(iter(self.train_loader))
+        data, target = self.prepare_batch(data, target, augment=True)
+        
+        self.model.train()
+        with torch.autocast(self.device.type, dtype=self.amp_dtype, enabled=self.use_amp):
+            loss = self.criterion(self.forward_model(data), target)
+        loss.backward()
+        self.optimizer.zero_grad(set_to_none=True)
+        
+        self.logger.info("Compiled model warmed up")
+    
     def train(self):
+        self.warmup_compiled_model()
+        
         best_val_acc = 0
         train_losses, train_accs = [], []
         val_losses, val_accs = [], []
@@ -363,6 +562,7 @@ class PerformativeTrainer:
                 self.save_checkpoint(epoch, val_acc, is_best=False)
         
         self.plot_training_curves(train_losses, train_accs, val_losses, val_accs)
+        self.wait_for_checkpoints()
         
         return {
             'best_val_acc': best_val_acc,
@@ -375,21 +575,31 @@ class PerformativeTrainer:
     def save_checkpoint(self, epoch, val_acc, is_best=False):
         checkpoint = {
             'epoch': epoch,
-            'model_state_dict': self.model.state_dict(),
-            'optimizer_state_dict': self.optimizer.state_dict(),
-            'scheduler_state_dict': self.scheduler.state_dict() if self.scheduler else None,
+            'model_state_dict': snapshot_to_cpu(self.model.state_dict()),
             'val_acc': val_acc,
             'config': self.config
         }
+        if not is_best and self.config.get('save_full_state', False):
+            checkpoint['optimizer_state_dict'] = snapshot_to_cpu(self.optimizer.state_dict())
+            checkpoint['scheduler_state_dict'] = self.scheduler.state_dict() if self.scheduler else None
         
         filename = f"checkpoint_epoch_{epoch}.pth"
         if is_best:
             filename = "best_model.pth"
         
+        self._last_save = self._save_pool.submit(self._write_checkpoint, checkpoint, filename)
+    
+    def _write_checkpoint(self, checkpoint, filename):
         torch.save(checkpoint, filename)
         self.logger.info(f"Checkpoint saved: {filename}")
     
+    def wait_for_checkpoints(self):
+        if self._last_save is not None:
+            self._last_save.result()
+    
     def plot_training_curves(self, train_losses, train_accs, val_losses, val_accs):
+        import matplotlib.pyplot as plt
+        
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
         
         epochs = range(1, len(train_losses) + 1)
@@ -416,26 +626,59 @@ class PerformativeTrainer:
         
         self.logger.info("Training curves saved as training_curves.png")
     
+    def fuse_for_eval(self):
+        self.model.eval()
+        if self.quantized or self.model.backbone_name:
+            return
+        
+        layers = list(self.model.features.children())
+        fuse_groups = [
+            [str(i), str(i + 1), str(i + 2)]
+            for i in range(len(layers) - 2)
+            if isinstance(layers[i], nn.Conv2d)
+            and isinstance(layers[i + 1], nn.BatchNorm2d)
+            and isinstance(layers[i + 2], nn.ReLU)
+        ]
+        if not fuse_groups:
+            return
+        
+        torch.ao.quantization.fuse_modules(self.model.features, fuse_groups, inplace=True)
+        
+        if self.forward_model is not self.model:
+            self.forward_model = torch.compile(self.model, mode='max-autotune', fullgraph=False)
+        
+        self.logger.info(f"Fused {len(fuse_groups)} Conv-BN-ReLU blocks for evaluation")
+    
     def test(self):
+        from sklearn.metrics import classification_report, confusion_matrix
+        
+        self.fuse_for_eval()
         self.model.eval()
-        test_loss = 0
-        correct = 0
-        all_preds = []
-        all_targets = []
+        test_loss = torch.zeros((), device=self.device)
+        correct = torch.zeros((), device=self.device, dtype=torch.long)
+        all_preds = torch.empty(len(self.test_loader.dataset), dtype=torch.long, device=self.device)
+        all_targets = torch.empty_like(all_preds)
+        offset = 0
         
-        with torch.no_grad():
+        with torch.inference_mode():
             for data, target in self.test_loader:
-                data, target = data.to(self.device), target.to(self.device)
-                output = self.model(data)
-                test_loss += self.criterion(output, target).item()
+                data, target = self.prepare_batch(data, target)
+                with torch.autocast(self.device.type, dtype=self.amp_dtype, enabled=self.use_amp):
+                    output = self.forward_model(data)
+                    test_loss += self.criterion(output, target)
                 pred = output.argmax(dim=1, keepdim=True)
-                correct += pred.eq(target.view_as(pred)).sum().item()
+                correct += pred.eq(target.view_as(pred)).sum()
                 
-                all_preds.extend(pred.cpu().numpy().flatten())
-                all_targets.extend(target.cpu().numpy())
+                n = target.size(0)
+                all_preds[offset:offset + n] = pred.squeeze(1)
+                all_targets[offset:offset + n] = target
+                offset += n
         
-        test_loss /= len(self.test_loader)
-        test_acc = 100. * correct / len(self.test_loader.dataset)
+        all_preds = all_preds[:offset].cpu().numpy()
+        all_targets = all_targets[:offset].cpu().numpy()
+        
+        test_loss = test_loss.item() / len(self.test_loader)
+        test_acc = 100. * correct.item() / len(self.test_loader.dataset)
         
         self.logger.info(f'Test Loss: {test_loss:.4f}, Test Accuracy: {test_acc:.2f}%')
         
@@ -449,6 +692,9 @@ class PerformativeTrainer:
         return test_acc, report, cm
     
     def plot_confusion_matrix(self, cm, class_names):
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         plt.figure(figsize=(8, 6))
         sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
                    xticklabels=class_names, yticklabels=class_names)
@@ -462,9 +708,12 @@ class PerformativeTrainer:
         self.logger.info("Confusion matrix saved as confusion_matrix.png")
 
 def main():
+    os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True,max_split_size_mb:512')
+    
     parser = argparse.ArgumentParser(description='Train Performative Classification Model')
     parser.add_argument('--config', type=str, required=True, help='Path to config file')
     parser.add_argument('--data_dir', type=str, required=True, help='Path to dataset directory')
+    parser.add_argument('--quantize', action='store_true', help='Quantize the model to INT8 and run only the test pass')
     
     args = parser.parse_args()
     
@@ -475,6 +724,12 @@ def main():
     
     trainer = PerformativeTrainer(config)
     
+    if args.quantize:
+        trainer.quantize_ptq()
+        test_results = trainer.test()
+        print(f"Quantized test accuracy: {test_results[0]:.2f}%")
+        return
+    
     training_results = trainer.train()
     test_results = trainer.test()
     
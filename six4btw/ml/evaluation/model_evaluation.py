@@ -1,33 +1,212 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    roc_auc_score, roc_curve, precision_recall_curve,
+    roc_curve, precision_recall_curve,
     confusion_matrix, classification_report
 )
-from sklearn.model_selection import cross_val_score, StratifiedKFold
+from scipy.stats import rankdata
 import torch
 import torch.nn.functional as F
-from torch.utils.data import DataLoader
-import cv2
-from PIL import Image
+from torch.utils.data import DataLoader, TensorDataset
 import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import json
 from datetime import datetime
 from pathlib import Path
 import argparse
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dump_json(obj, save_path):
+    if orjson is not None:
+        with open(save_path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    
+    with open(save_path, 'w') as f:
+        json.dump(obj, f, indent=2)
+
+def fast_binary_auc(y_true, score):
+    pos = y_true == 1
+    n_pos = int(pos.sum())
+    n_neg = len(y_true) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float('nan')
+    ranks = rankdata(score)
+    return float((ranks[pos].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+def split_signature(split_dir):
+    digest = hashlib.sha1()
+    if not split_dir.is_dir():
+        return digest.hexdigest()
+    
+    for class_dir in sorted(path for path in split_dir.iterdir() if path.is_dir()):
+        with os.scandir(class_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_file():
+                    stat = entry.stat()
+                    digest.update(f'{class_dir.name}/{entry.name}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+def load_pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def render_confusion_matrix(cm, class_names, save_path='confusion_matrix.png'):
+    plt = load_pyplot()
+    
+    fig, ax = plt.subplots(figsize=(10, 8))
+    im = ax.imshow(cm, cmap='Blues')
+    fig.colorbar(im, ax=ax, label='Count')
+    ax.set_xticks(range(len(class_names)))
+    ax.set_yticks(range(len(class_names)))
+    ax.set_xticklabels(class_names)
+    ax.set_yticklabels(class_names)
+    
+    threshold = cm.max() / 2
+    for i in range(cm.shape[0]):
+        for j in range(cm.shape[1]):
+            ax.text(j, i, f'{cm[i, j]:d}', ha='center', va='center',
+                   color='white' if cm[i, j] > threshold else 'black')
+    
+    plt.title('Confusion Matrix - Performative Classification', fontsize=16, pad=20)
+    plt.xlabel('Predicted Label', fontsize=12)
+    plt.ylabel('True Label', fontsize=12)
+    
+    accuracy = np.trace(cm) / max(cm.sum(), 1)
+    plt.figtext(0.5, 0.02, f'Overall Accuracy: {accuracy:.3f}', 
+               ha='center', fontsize=12, weight='bold')
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150)
+    plt.close()
+    
+    print(f"Confusion matrix saved to {save_path}")
+
+def compute_roc(y_true, y_prob):
+    if y_prob.shape[1] < 2:
+        return None
+    
+    fpr, tpr, _ = roc_curve(y_true, y_prob[:, 1])
+    return fpr, tpr, fast_binary_auc(y_true, y_prob[:, 1])
+
+def render_roc_curve(roc, save_path='roc_curve.png'):
+    plt = load_pyplot()
+    
+    if roc is None:
+        print("Cannot plot ROC curve for single class")
+        return
+    
+    fpr, tpr, auc_score = roc
+    
+    plt.figure(figsize=(10, 8))
+    plt.plot(fpr, tpr, color='darkorange', lw=2, 
+            label=f'ROC Curve (AUC = {auc_score:.3f})')
+    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--', 
+            label='Random Classifier')
+    
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate', fontsize=12)
+    plt.ylabel('True Positive Rate', fontsize=12)
+    plt.title('ROC Curve - Performative vs Authentic Classification', fontsize=14)
+    plt.legend(loc="lower right", fontsize=12)
+    plt.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150)
+    plt.close()
+    
+    print(f"ROC curve saved to {save_path}")
+
+def render_precision_recall_curve(y_true, y_prob, save_path='precision_recall_curve.png'):
+    plt = load_pyplot()
+    
+    if y_prob.shape[1] < 2:
+        print("Cannot plot PR curve for single class")
+        return
+    
+    precision, recall, _ = precision_recall_curve(y_true, y_prob[:, 1])
+    
+    plt.figure(figsize=(10, 8))
+    plt.plot(recall, precision, color='blue', lw=2, 
+            label='Precision-Recall Curve')
+    
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('Recall', fontsize=12)
+    plt.ylabel('Precision', fontsize=12)
+    plt.title('Precision-Recall Curve - Performative Classification', fontsize=14)
+    plt.legend(loc="lower left", fontsize=12)
+    plt.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150)
+    plt.close()
+    
+    print(f"Precision-Recall curve saved to {save_path}")
+
+def render_score_distribution(y_true, y_prob, save_path='score_distribution.png'):
+    plt = load_pyplot()
+    
+    if y_prob.shape[1] < 2:
+        print("Cannot plot score distribution for single class")
+        return
+    
+    performative_scores = y_prob[:, 1]
+    
+    authentic_scores = performative_scores[y_true == 0]
+    performative_true_scores = performative_scores[y_true == 1]
+    
+    edges = np.linspace(0, 1, 31)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+    width = edges[1] - edges[0]
+    authentic_hist, _ = np.histogram(authentic_scores, bins=edges, density=True)
+    performative_hist, _ = np.histogram(performative_true_scores, bins=edges, density=True)
+    
+    plt.figure(figsize=(12, 8))
+    
+    plt.bar(centers, authentic_hist, width=width, alpha=0.7, label='Authentic (True)', 
+            color='green')
+    plt.bar(centers, performative_hist, width=width, alpha=0.7, label='Performative (True)', 
+            color='red')
+    
+    plt.xlabel('Performative Score', fontsize=12)
+    plt.ylabel('Density', fontsize=12)
+    plt.title('Distribution of Performative Scores by True Class', fontsize=14)
+    plt.legend(fontsize=12)
+    plt.grid(True, alpha=0.3)
+    
+    plt.axvline(x=0.5, color='black', linestyle='--', alpha=0.8, 
+               label='Decision Threshold (0.5)')
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150)
+    plt.close()
+    
+    print(f"Score distribution plot saved to {save_path}")
+
 class PerformativeModelEvaluator:
-    def __init__(self, model_path, test_data_path, device=None):
+    def __init__(self, model_path, test_data_path, device=None, batch_size=256):
         self.model_path = model_path
         self.test_data_path = Path(test_data_path)
         self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
         self.test_loader = None
         self.class_names = ['Authentic', 'Performative']
+        self.batch_size = batch_size
+        self.use_amp = self.device.type == 'cuda'
+        self.input_dtype = torch.float16 if self.use_amp else torch.float32
+        self.cuda_graph = None
+        self.static_input = None
+        self.static_output = None
         
         self.load_model()
         self.setup_test_data()
@@ -40,15 +219,57 @@ class PerformativeModelEvaluator:
             checkpoint = torch.load(self.model_path, map_location=self.device)
             self.model.load_state_dict(checkpoint['model_state_dict'])
             self.model.to(self.device)
+            self.model = self.model.to(memory_format=torch.channels_last)
             self.model.eval()
             
+            if self.device.type == 'cuda':
+                self.capture_cuda_graph()
+            elif hasattr(torch, 'compile'):
+                self.model = torch.compile(self.model, fullgraph=False)
+                self.warmup_model()
+            
             print(f"Model loaded successfully from {self.model_path}")
             
         except Exception as e:
             print(f"Error loading model: {e}")
             raise
     
-    def setup_test_data(self):
+    def warmup_model(self):
+        data = torch.zeros(self.batch_size, 3, 224, 224, device=self.device, dtype=self.input_dtype)
+        data = data.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.use_amp):
+            for _ in range(3):
+                self.model(data)
+    
+    def capture_cuda_graph(self):
+        self.static_input = torch.zeros(
+            self.batch_size, 3, 224, 224, device=self.device, dtype=self.input_dtype
+        ).contiguous(memory_format=torch.channels_last)
+        
+        with torch.inference_mode(), torch.autocast(device_type='cuda', dtype=torch.float16, cache_enabled=False):
+            side_stream = torch.cuda.Stream(self.device)
+            side_stream.wait_stream(torch.cuda.current_stream(self.device))
+            with torch.cuda.stream(side_stream):
+                for _ in range(3):
+                    self.model(self.static_input)
+            torch.cuda.current_stream(self.device).wait_stream(side_stream)
+            
+            self.cuda_graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(self.cuda_graph):
+                self.static_output = self.model(self.static_input)
+    
+    def run_model(self, data):
+        if self.cuda_graph is None:
+            data = data.to(
+                self.device, dtype=self.input_dtype, non_blocking=True, memory_format=torch.channels_last
+            )
+            return self.model(data)
+        
+        self.static_input.copy_(data, non_blocking=True)
+        self.cuda_graph.replay()
+        return self.static_output
+    
+    def _build_cache(self, cache_path, signature):
         from image_dataset_generator import PerformativeImageDataset
         import torchvision.transforms as transforms
         
@@ -62,234 +283,188 @@ class PerformativeModelEvaluator:
             self.test_data_path.parent, 'test', transform=test_transform
         )
         
+        loader = DataLoader(
+            test_dataset, batch_size=self.batch_size, shuffle=False,
+            num_workers=min(os.cpu_count() or 1, 8)
+        )
+        
+        x = torch.empty((len(test_dataset), 3, 224, 224), dtype=self.input_dtype)
+        y = torch.empty(len(test_dataset), dtype=torch.long)
+        offset = 0
+        for data, target in tqdm(loader, desc="Caching test tensors"):
+            end = offset + data.size(0)
+            x[offset:end] = data
+            y[offset:end] = target
+            offset = end
+        
+        torch.save({'x': x[:offset], 'y': y[:offset], 'signature': signature}, cache_path)
+    
+    def setup_test_data(self):
+        cache_path = self.test_data_path.parent / 'eval_cache.pt'
+        signature = f"{split_signature(self.test_data_path.parent / 'test')}:{self.input_dtype}"
+        
+        cache = torch.load(cache_path, mmap=True) if cache_path.exists() else None
+        if cache is None or cache.get('signature') != signature:
+            self._build_cache(cache_path, signature)
+            cache = torch.load(cache_path, mmap=True)
+        test_dataset = TensorDataset(cache['x'], cache['y'])
+        
         self.test_loader = DataLoader(
-            test_dataset, batch_size=32, shuffle=False, num_workers=4
+            test_dataset, batch_size=self.batch_size, shuffle=False, drop_last=False, pin_memory=True
         )
         
         print(f"Test dataset loaded: {len(test_dataset)} samples")
     
-    def predict_batch(self, data_loader):
-        all_predictions = []
-        all_probabilities = []
-        all_targets = []
-        
-        with torch.no_grad():
+    def predict_batch(self, data_loader, return_probs=True):
+        num_samples = len(data_loader.dataset)
+        all_targets = np.empty(num_samples, dtype=np.int64)
+        offset = 0
+        
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.use_amp):
+            all_predictions = torch.empty(num_samples, dtype=torch.long, device=self.device)
+            all_probabilities = None
+            if return_probs:
+                all_probabilities = torch.empty(
+                    (num_samples, len(self.class_names)), dtype=torch.float32, device=self.device
+                )
             for data, target in tqdm(data_loader, desc="Making predictions"):
-                data, target = data.to(self.device), target.to(self.device)
+                batch_len = data.size(0)
+                if batch_len < self.batch_size:
+                    data = F.pad(data, (0, 0, 0, 0, 0, 0, 0, self.batch_size - batch_len))
                 
-                outputs = self.model(data)
-                probabilities = F.softmax(outputs, dim=1)
-                predictions = torch.argmax(probabilities, dim=1)
+                outputs = self.run_model(data)[:batch_len]
                 
-                all_predictions.extend(predictions.cpu().numpy())
-                all_probabilities.extend(probabilities.cpu().numpy())
-                all_targets.extend(target.cpu().numpy())
-        
-        return np.array(all_predictions), np.array(all_probabilities), np.array(all_targets)
+                end = offset + batch_len
+                all_predictions[offset:end] = outputs.argmax(dim=1)
+                if return_probs:
+                    all_probabilities[offset:end] = F.softmax(outputs.float(), dim=1)
+                all_targets[offset:end] = target.numpy()
+                offset = end
+        
+        return (
+            all_predictions[:offset].cpu().numpy(),
+            all_probabilities[:offset].cpu().numpy() if return_probs else None,
+            all_targets[:offset]
+        )
     
     def calculate_metrics(self, y_true, y_pred, y_prob):
+        cm = confusion_matrix(y_true, y_pred, labels=range(len(self.class_names)))
+        
+        tp = np.diag(cm)
+        support = cm.sum(axis=1)
+        fp = cm.sum(axis=0) - tp
+        fn = support - tp
+        precision = tp / np.maximum(tp + fp, 1)
+        recall = tp / np.maximum(tp + fn, 1)
+        f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-12)
+        weights = support / max(support.sum(), 1)
+        roc = compute_roc(y_true, y_prob)
+        
         metrics = {
-            'accuracy': accuracy_score(y_true, y_pred),
-            'precision': precision_score(y_true, y_pred, average='weighted'),
-            'recall': recall_score(y_true, y_pred, average='weighted'),
-            'f1_score': f1_score(y_true, y_pred, average='weighted'),
-            'roc_auc': roc_auc_score(y_true, y_prob[:, 1]) if y_prob.shape[1] > 1 else None
+            'accuracy': float(tp.sum() / max(cm.sum(), 1)),
+            'precision': float(precision @ weights),
+            'recall': float(recall @ weights),
+            'f1_score': float(f1 @ weights),
+            'roc_auc': roc[2] if roc is not None else None
         }
         
-        per_class_metrics = {}
-        for i, class_name in enumerate(self.class_names):
-            y_true_binary = (y_true == i).astype(int)
-            y_pred_binary = (y_pred == i).astype(int)
-            
-            per_class_metrics[class_name] = {
-                'precision': precision_score(y_true_binary, y_pred_binary, zero_division=0),
-                'recall': recall_score(y_true_binary, y_pred_binary, zero_division=0),
-                'f1_score': f1_score(y_true_binary, y_pred_binary, zero_division=0)
+        per_class_metrics = {
+            class_name: {
+                'precision': float(precision[i]),
+                'recall': float(recall[i]),
+                'f1_score': float(f1[i])
             }
+            for i, class_name in enumerate(self.class_names)
+        }
         
-        return metrics, per_class_metrics
+        return metrics, per_class_metrics, cm, roc
     
-    def plot_confusion_matrix(self, y_true, y_pred, save_path='confusion_matrix.png'):
-        cm = confusion_matrix(y_true, y_pred)
-        
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                   xticklabels=self.class_names, yticklabels=self.class_names,
-                   cbar_kws={'label': 'Count'})
-        
-        plt.title('Confusion Matrix - Performative Classification', fontsize=16, pad=20)
-        plt.xlabel('Predicted Label', fontsize=12)
-        plt.ylabel('True Label', fontsize=12)
-        
-        accuracy = accuracy_score(y_true, y_pred)
-        plt.figtext(0.5, 0.02, f'Overall Accuracy: {accuracy:.3f}', 
-                   ha='center', fontsize=12, weight='bold')
-        
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"Confusion matrix saved to {save_path}")
+    def plot_confusion_matrix(self, y_true, y_pred, save_path='confusion_matrix.png', cm=None):
+        if cm is None:
+            cm = confusion_matrix(y_true, y_pred)
+        render_confusion_matrix(cm, self.class_names, save_path)
     
-    def plot_roc_curve(self, y_true, y_prob, save_path='roc_curve.png'):
-        if y_prob.shape[1] < 2:
-            print("Cannot plot ROC curve for single class")
-            return
-        
-        fpr, tpr, _ = roc_curve(y_true, y_prob[:, 1])
-        auc_score = roc_auc_score(y_true, y_prob[:, 1])
-        
-        plt.figure(figsize=(10, 8))
-        plt.plot(fpr, tpr, color='darkorange', lw=2, 
-                label=f'ROC Curve (AUC = {auc_score:.3f})')
-        plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--', 
-                label='Random Classifier')
-        
-        plt.xlim([0.0, 1.0])
-        plt.ylim([0.0, 1.05])
-        plt.xlabel('False Positive Rate', fontsize=12)
-        plt.ylabel('True Positive Rate', fontsize=12)
-        plt.title('ROC Curve - Performative vs Authentic Classification', fontsize=14)
-        plt.legend(loc="lower right", fontsize=12)
-        plt.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"ROC curve saved to {save_path}")
+    def plot_roc_curve(self, y_true, y_prob, save_path='roc_curve.png', roc=None):
+        if roc is None:
+            roc = compute_roc(y_true, y_prob)
+        render_roc_curve(roc, save_path)
     
     def plot_precision_recall_curve(self, y_true, y_prob, save_path='precision_recall_curve.png'):
-        if y_prob.shape[1] < 2:
-            print("Cannot plot PR curve for single class")
-            return
-        
-        precision, recall, _ = precision_recall_curve(y_true, y_prob[:, 1])
-        
-        plt.figure(figsize=(10, 8))
-        plt.plot(recall, precision, color='blue', lw=2, 
-                label='Precision-Recall Curve')
-        
-        plt.xlim([0.0, 1.0])
-        plt.ylim([0.0, 1.05])
-        plt.xlabel('Recall', fontsize=12)
-        plt.ylabel('Precision', fontsize=12)
-        plt.title('Precision-Recall Curve - Performative Classification', fontsize=14)
-        plt.legend(loc="lower left", fontsize=12)
-        plt.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"Precision-Recall curve saved to {save_path}")
+        render_precision_recall_curve(y_true, y_prob, save_path)
     
     def plot_score_distribution(self, y_true, y_prob, save_path='score_distribution.png'):
-        if y_prob.shape[1] < 2:
-            print("Cannot plot score distribution for single class")
-            return
-        
-        performative_scores = y_prob[:, 1]
-        
-        authentic_scores = performative_scores[y_true == 0]
-        performative_true_scores = performative_scores[y_true == 1]
-        
-        plt.figure(figsize=(12, 8))
-        
-        plt.hist(authentic_scores, bins=30, alpha=0.7, label='Authentic (True)', 
-                color='green', density=True)
-        plt.hist(performative_true_scores, bins=30, alpha=0.7, label='Performative (True)', 
-                color='red', density=True)
-        
-        plt.xlabel('Performative Score', fontsize=12)
-        plt.ylabel('Density', fontsize=12)
-        plt.title('Distribution of Performative Scores by True Class', fontsize=14)
-        plt.legend(fontsize=12)
-        plt.grid(True, alpha=0.3)
-        
-        plt.axvline(x=0.5, color='black', linestyle='--', alpha=0.8, 
-                   label='Decision Threshold (0.5)')
-        
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"Score distribution plot saved to {save_path}")
+        render_score_distribution(y_true, y_prob, save_path)
     
     def analyze_misclassifications(self, y_true, y_pred, y_prob, save_path='misclassification_analysis.json'):
-        misclassified_indices = np.where(y_true != y_pred)[0]
+        confidence = y_prob.max(axis=1)
+        wrong = y_true != y_pred
+        num_wrong = int(wrong.sum())
+        
+        def confidence_records(mask):
+            idxs = np.flatnonzero(mask)
+            return [
+                {
+                    'index': idx,
+                    'true_label': true_label,
+                    'predicted_label': predicted_label,
+                    'confidence': conf,
+                    'performative_score': score
+                }
+                for idx, true_label, predicted_label, conf, score in zip(
+                    idxs.tolist(), y_true[idxs].tolist(), y_pred[idxs].tolist(),
+                    confidence[idxs].tolist(), y_prob[idxs, 1].tolist()
+                )
+            ]
         
         analysis = {
-            'total_misclassifications': len(misclassified_indices),
-            'misclassification_rate': len(misclassified_indices) / len(y_true),
-            'false_positives': np.sum((y_true == 0) & (y_pred == 1)),
-            'false_negatives': np.sum((y_true == 1) & (y_pred == 0)),
-            'high_confidence_errors': [],
-            'low_confidence_correct': []
+            'total_misclassifications': num_wrong,
+            'misclassification_rate': num_wrong / len(y_true),
+            'false_positives': int(((y_true == 0) & (y_pred == 1)).sum()),
+            'false_negatives': int(((y_true == 1) & (y_pred == 0)).sum()),
+            'high_confidence_errors': confidence_records(wrong & (confidence > 0.8)),
+            'low_confidence_correct': confidence_records(~wrong & (confidence < 0.6))
         }
         
-        for idx in misclassified_indices:
-            confidence = np.max(y_prob[idx])
-            if confidence > 0.8:
-                analysis['high_confidence_errors'].append({
-                    'index': int(idx),
-                    'true_label': int(y_true[idx]),
-                    'predicted_label': int(y_pred[idx]),
-                    'confidence': float(confidence),
-                    'performative_score': float(y_prob[idx, 1])
-                })
-        
-        correct_indices = np.where(y_true == y_pred)[0]
-        for idx in correct_indices:
-            confidence = np.max(y_prob[idx])
-            if confidence < 0.6:
-                analysis['low_confidence_correct'].append({
-                    'index': int(idx),
-                    'true_label': int(y_true[idx]),
-                    'predicted_label': int(y_pred[idx]),
-                    'confidence': float(confidence),
-                    'performative_score': float(y_prob[idx, 1])
-                })
-        
-        with open(save_path, 'w') as f:
-            json.dump(analysis, f, indent=2)
+        dump_json(analysis, save_path)
         
         print(f"Misclassification analysis saved to {save_path}")
         return analysis
     
     def evaluate_performative_score_accuracy(self, y_true, y_prob):
-        performative_scores = (y_prob[:, 1] * 100).astype(int)
-        
-        score_ranges = [
-            (0, 20, "Authentic"),
-            (20, 40, "Mildly Performative"),
-            (40, 60, "Moderately Performative"),
-            (60, 80, "Highly Performative"),
-            (80, 100, "Peak Performative")
+        performative_scores = (y_prob[:, 1] * 100).astype(np.int32)
+        
+        score_labels = [
+            "Authentic",
+            "Mildly Performative",
+            "Moderately Performative",
+            "Highly Performative",
+            "Peak Performative"
         ]
+        edges = np.array([0, 20, 40, 60, 80, 100])
         
-        range_accuracy = {}
+        bucket = np.clip(np.digitize(performative_scores, edges) - 1, 0, len(score_labels) - 1)
+        correct = ((performative_scores >= 50).astype(np.int32) == y_true).astype(np.int32)
+        counts = np.bincount(bucket, minlength=len(score_labels))
+        hits = np.bincount(bucket, weights=correct, minlength=len(score_labels))
+        accuracy = hits / np.maximum(counts, 1)
         
-        for min_score, max_score, label in score_ranges:
-            mask = (performative_scores >= min_score) & (performative_scores < max_score)
-            if np.sum(mask) > 0:
-                range_true = y_true[mask]
-                range_pred = (performative_scores[mask] >= 50).astype(int)
-                accuracy = accuracy_score(range_true, range_pred)
+        range_accuracy = {}
+        for i, label in enumerate(score_labels):
+            if counts[i] > 0:
                 range_accuracy[label] = {
-                    'accuracy': accuracy,
-                    'sample_count': np.sum(mask),
-                    'score_range': f"{min_score}-{max_score}"
+                    'accuracy': float(accuracy[i]),
+                    'sample_count': int(counts[i]),
+                    'score_range': f"{edges[i]}-{edges[i + 1]}"
                 }
         
         return range_accuracy
     
-    def generate_comprehensive_report(self):
+    def generate_comprehensive_report(self, plots=True):
         print("Starting comprehensive model evaluation...")
         
         predictions, probabilities, targets = self.predict_batch(self.test_loader)
         
-        metrics, per_class_metrics = self.calculate_metrics(targets, predictions, probabilities)
+        metrics, per_class_metrics, cm, roc = self.calculate_metrics(targets, predictions, probabilities)
         
         print("\n" + "="*50)
         print("COMPREHENSIVE EVALUATION REPORT")
@@ -313,10 +488,16 @@ class PerformativeModelEvaluator:
         print(f"\nDetailed Classification Report:")
         print(classification_report(targets, predictions, target_names=self.class_names))
         
-        self.plot_confusion_matrix(targets, predictions)
-        self.plot_roc_curve(targets, probabilities)
-        self.plot_precision_recall_curve(targets, probabilities)
-        self.plot_score_distribution(targets, probabilities)
+        plot_pool = None
+        plot_futures = []
+        if plots:
+            plot_pool = ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context('spawn'))
+            plot_futures = [
+                plot_pool.submit(render_confusion_matrix, cm, self.class_names),
+                plot_pool.submit(render_roc_curve, roc),
+                plot_pool.submit(render_precision_recall_curve, targets, probabilities),
+                plot_pool.submit(render_score_distribution, targets, probabilities)
+            ]
         
         misclass_analysis = self.analyze_misclassifications(targets, predictions, probabilities)
         
@@ -340,8 +521,12 @@ class PerformativeModelEvaluator:
             }
         }
         
-        with open('evaluation_summary.json', 'w') as f:
-            json.dump(evaluation_summary, f, indent=2)
+        dump_json(evaluation_summary, 'evaluation_summary.json')
+        
+        for future in plot_futures:
+            future.result()
+        if plot_pool is not None:
+            plot_pool.shutdown()
         
         print(f"\nEvaluation complete! Summary saved to evaluation_summary.json")
         print(f"Total test samples: {len(targets)}")
@@ -357,15 +542,19 @@ def main():
                        help='Path to test dataset directory')
     parser.add_argument('--output_dir', type=str, default='evaluation_results',
                        help='Directory to save evaluation results')
+    parser.add_argument('--batch_size', type=int, default=256,
+                       help='Inference batch size')
+    parser.add_argument('--no-plots', dest='plots', action='store_false',
+                       help='Skip rendering evaluation plots')
     
     args = parser.parse_args()
     
     os.makedirs(args.output_dir, exist_ok=True)
     os.chdir(args.output_dir)
     
-    evaluator = PerformativeModelEvaluator(args.model_path, args.test_data_path)
+    evaluator = PerformativeModelEvaluator(args.model_path, args.test_data_path, batch_size=args.batch_size)
     
-    evaluation_results = evaluator.generate_comprehensive_report()
+    evaluation_results = evaluator.generate_comprehensive_report(plots=args.plots)
     
     print(f"\nAll evaluation results saved to: {os.getcwd()}")
 
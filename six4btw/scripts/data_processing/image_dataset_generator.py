@@ -2,15 +2,69 @@ import os
 import cv2
 import numpy as np
 import pandas as pd
-from PIL import Image, ImageEnhance, ImageFilter
 import random
 import json
 from pathlib import Path
 import argparse
 from tqdm import tqdm
 import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+SEPIA_KERNEL = np.array([[0.393, 0.769, 0.189],
+                         [0.349, 0.686, 0.168],
+                         [0.272, 0.534, 0.131]], dtype=np.float32)
+
+JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85]
+METADATA_SIZE = (128, 128)
+METADATA_DTYPES = {
+    'brightness': 'float32', 'contrast': 'float32', 'color_variance': 'float32', 'edge_density': 'float32',
+    'sift_keypoints': 'int32', 'contour_count': 'int32', 'performative_score': 'int16',
+    'width': 'int16', 'height': 'int16'
+}
+SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]], dtype=np.float32)
+
+_rng = None
+_rng_pid = None
+_gaussian_kernels = {}
+_sift = None
+
+def worker_rng():
+    global _rng, _rng_pid
+    if _rng is None or _rng_pid != os.getpid():
+        _rng = np.random.default_rng()
+        _rng_pid = os.getpid()
+    return _rng
+
+def get_sift():
+    global _sift
+    if _sift is None:
+        _sift = cv2.SIFT_create()
+    return _sift
+
+def gaussian_kernel(size, sigma=0):
+    kernel = _gaussian_kernels.get((size, sigma))
+    if kernel is None:
+        kernel = _gaussian_kernels[(size, sigma)] = cv2.getGaussianKernel(size, sigma)
+    return kernel
+
+def gaussian_blur(image, size, sigma=0):
+    kernel = gaussian_kernel(size, sigma)
+    return cv2.sepFilter2D(image, -1, kernel, kernel)
+
+def adjust_saturation(image, factor):
+    gray = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+    return cv2.addWeighted(image, factor, gray, 1 - factor, 0)
+
+def adjust_contrast(image, factor):
+    mean = int(cv2.mean(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY))[0] + 0.5)
+    return cv2.addWeighted(image, factor, image, 0, mean * (1 - factor))
+
 class PerformativeImageGenerator:
     def __init__(self, output_dir, num_samples=10000):
         self.output_dir = Path(output_dir)
@@ -38,6 +92,9 @@ class PerformativeImageGenerator:
             'desaturated', 'high_contrast', 'soft_focus'
         ]
         
+        self._vignette_masks = {}
+        self._grain_buffers = {}
+        
         self.setup_directories()
     
     def setup_directories(self):
@@ -50,7 +107,7 @@ class PerformativeImageGenerator:
         (self.output_dir / 'test' / 'authentic').mkdir(parents=True, exist_ok=True)
     
     def generate_synthetic_image(self, width=512, height=512, performative=True):
-        image = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+        image = worker_rng().integers(0, 256, size=(height, width, 3), dtype=np.uint8)
         
         if performative:
             image = self.add_performative_elements(image)
@@ -103,78 +160,72 @@ class PerformativeImageGenerator:
     def add_authentic_elements(self, image):
         h, w = image.shape[:2]
         
-        num_elements = random.randint(1, 3)
+        rng = worker_rng()
+        num_elements = int(rng.integers(1, 4))
+        element_types = rng.integers(0, 3, size=num_elements).tolist()
+        colors = rng.integers(0, 256, size=(num_elements, 3)).tolist()
+        positions = rng.random((num_elements, 4)).tolist()
+        thicknesses = rng.integers(2, 9, size=num_elements).tolist()
         
-        for _ in range(num_elements):
-            element_type = random.choice(['circle', 'rectangle', 'line'])
-            color = tuple(random.randint(0, 255) for _ in range(3))
+        for element_type, color, (a, b, c, d), thickness in zip(element_types, colors, positions, thicknesses):
+            color = tuple(color)
             
-            if element_type == 'circle':
-                center = (random.randint(50, w-50), random.randint(50, h-50))
-                radius = random.randint(20, 80)
+            if element_type == 0:
+                center = (50 + int(a * (w - 99)), 50 + int(b * (h - 99)))
+                radius = 20 + int(c * 61)
                 cv2.circle(image, center, radius, color, -1)
             
-            elif element_type == 'rectangle':
-                x1, y1 = random.randint(0, w//2), random.randint(0, h//2)
-                x2, y2 = random.randint(x1, w), random.randint(y1, h)
+            elif element_type == 1:
+                x1, y1 = int(a * (w // 2 + 1)), int(b * (h // 2 + 1))
+                x2, y2 = x1 + int(c * (w - x1 + 1)), y1 + int(d * (h - y1 + 1))
                 cv2.rectangle(image, (x1, y1), (x2, y2), color, -1)
             
-            elif element_type == 'line':
-                pt1 = (random.randint(0, w), random.randint(0, h))
-                pt2 = (random.randint(0, w), random.randint(0, h))
-                cv2.line(image, pt1, pt2, color, random.randint(2, 8))
+            else:
+                pt1 = (int(a * (w + 1)), int(b * (h + 1)))
+                pt2 = (int(c * (w + 1)), int(d * (h + 1)))
+                cv2.line(image, pt1, pt2, color, thickness)
         
         return image
     
     def apply_aesthetic_filter(self, image):
         filter_type = random.choice(self.aesthetic_filters)
         
-        pil_image = Image.fromarray(image)
-        
         if filter_type == 'vintage':
-            enhancer = ImageEnhance.Color(pil_image)
-            pil_image = enhancer.enhance(0.7)
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.2)
+            return adjust_contrast(adjust_saturation(image, 0.7), 1.2)
         
         elif filter_type == 'sepia':
-            pixels = np.array(pil_image)
-            sepia_filter = np.array([[0.393, 0.769, 0.189],
-                                   [0.349, 0.686, 0.168],
-                                   [0.272, 0.534, 0.131]])
-            sepia_img = pixels.dot(sepia_filter.T)
-            sepia_img = np.clip(sepia_img, 0, 255)
-            pil_image = Image.fromarray(sepia_img.astype(np.uint8))
+            return cv2.transform(image, SEPIA_KERNEL)
         
         elif filter_type == 'film_grain':
-            noise = np.random.normal(0, 25, image.shape).astype(np.uint8)
-            noisy_image = cv2.add(image, noise)
-            pil_image = Image.fromarray(noisy_image)
+            noise = self._grain_buffers.get(image.shape)
+            if noise is None:
+                noise = self._grain_buffers[image.shape] = np.empty(image.shape, dtype=np.int16)
+            cv2.randn(noise, 0, 25)
+            return cv2.add(image, noise, dst=image, dtype=cv2.CV_8U)
         
         elif filter_type == 'vignette':
-            h, w = image.shape[:2]
-            kernel_x = cv2.getGaussianKernel(w, w/4)
-            kernel_y = cv2.getGaussianKernel(h, h/4)
-            kernel = kernel_y * kernel_x.T
-            mask = kernel / kernel.max()
-            
-            for i in range(3):
-                image[:, :, i] = image[:, :, i] * mask
-            
-            pil_image = Image.fromarray(image)
+            return cv2.multiply(image, self.vignette_mask(*image.shape[:2]), dtype=cv2.CV_8U)
         
         elif filter_type == 'desaturated':
-            enhancer = ImageEnhance.Color(pil_image)
-            pil_image = enhancer.enhance(0.3)
+            return adjust_saturation(image, 0.3)
         
         elif filter_type == 'high_contrast':
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.8)
+            return adjust_contrast(image, 1.8)
         
         elif filter_type == 'soft_focus':
-            pil_image = pil_image.filter(ImageFilter.GaussianBlur(radius=1.5))
+            return gaussian_blur(image, 11, 1.5)
         
-        return np.array(pil_image)
+        return image
+    
+    def vignette_mask(self, h, w):
+        mask = self._vignette_masks.get((h, w))
+        if mask is None:
+            kernel_x = cv2.getGaussianKernel(w, w/4)
+            kernel_y = cv2.getGaussianKernel(h, h/4)
+            kernel = kernel_y * kernel_x.T
+            mask = np.repeat((kernel / kernel.max()).astype(np.float32)[:, :, None], 3, axis=2)
+            self._vignette_masks[(h, w)] = mask
+        return mask
     
     def generate_metadata(self, image, label, items_present=None):
         h, w = image.shape[:2]
@@ -192,11 +243,12 @@ class PerformativeImageGenerator:
             'performative_score': self.calculate_performative_score(items_present or [])
         }
         
-        sift = cv2.SIFT_create()
-        keypoints, _ = sift.detectAndCompute(gray, None)
+        gray_small = cv2.resize(gray, METADATA_SIZE, interpolation=cv2.INTER_AREA)
+        
+        keypoints, _ = get_sift().detectAndCompute(gray_small, None)
         metadata['sift_keypoints'] = len(keypoints) if keypoints else 0
         
-        edges = cv2.Canny(gray, 50, 150)
+        edges = cv2.Canny(gray_small, 50, 150)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         metadata['contour_count'] = len(contours)
         metadata['edge_density'] = float(np.sum(edges > 0) / edges.size)
@@ -230,7 +282,9 @@ class PerformativeImageGenerator:
         filename = f"{label}_{idx:06d}.jpg"
         filepath = self.output_dir / split / label / filename
         
-        cv2.imwrite(str(filepath), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        ok, encoded = cv2.imencode('.jpg', cv2.cvtColor(image, cv2.COLOR_RGB2BGR), JPEG_PARAMS)
+        if ok:
+            filepath.write_bytes(encoded.tobytes())
         
         metadata = self.generate_metadata(image, label, items_present)
         metadata['filename'] = filename
@@ -265,15 +319,23 @@ class PerformativeImageGenerator:
         
         print(f"Generating {len(all_tasks)} images...")
         
-        with mp.Pool(processes=mp.cpu_count()) as pool:
+        chunksize = max(32, len(all_tasks) // (mp.cpu_count() * 8))
+        with ProcessPoolExecutor(
+            max_workers=mp.cpu_count(),
+            initializer=init_generator_worker,
+            initargs=(str(self.output_dir), self.num_samples)
+        ) as executor:
             metadata_list = list(tqdm(
-                pool.imap(self.generate_single_image, all_tasks),
+                executor.map(generate_image_task, all_tasks, chunksize=chunksize),
                 total=len(all_tasks),
                 desc="Generating images"
             ))
         
-        metadata_df = pd.DataFrame(metadata_list)
+        metadata_df = pd.DataFrame.from_records(metadata_list).astype(METADATA_DTYPES)
+        metadata_df = metadata_df.sort_values('filepath', ignore_index=True)
         metadata_df.to_csv(self.output_dir / 'dataset_metadata.csv', index=False)
+        if pyarrow is not None:
+            metadata_df.to_parquet(self.output_dir / 'dataset_metadata.parquet', index=False)
         
         dataset_info = {
             'total_samples': self.num_samples,
@@ -294,6 +356,17 @@ class PerformativeImageGenerator:
         
         return metadata_df
 
+_worker_generator = None
+
+def init_generator_worker(output_dir, num_samples):
+    global _worker_generator
+    _worker_generator = PerformativeImageGenerator(output_dir, num_samples)
+    cv2.setRNGSeed(int(worker_rng().integers(2**31)))
+    get_sift()
+
+def generate_image_task(task):
+    return _worker_generator.generate_single_image(task)
+
 def augment_existing_dataset(input_dir, output_dir, augmentation_factor=3):
     input_path = Path(input_dir)
     output_path = Path(output_dir)
@@ -308,6 +381,7 @@ def augment_existing_dataset(input_dir, output_dir, augmentation_factor=3):
         {'blur': 2}, {'sharpen': True}
     ]
     
+    tasks = []
     for split in ['train', 'val', 'test']:
         for label in ['performative', 'authentic']:
             input_split_dir = input_path / split / label
@@ -317,17 +391,28 @@ def augment_existing_dataset(input_dir, output_dir, augmentation_factor=3):
             if input_split_dir.exists():
                 image_files = list(input_split_dir.glob('*.jpg')) + list(input_split_dir.glob('*.png'))
                 
-                for img_file in tqdm(image_files, desc=f"Augmenting {split}/{label}"):
-                    image = cv2.imread(str(img_file))
-                    
-                    cv2.imwrite(str(output_split_dir / img_file.name), image)
-                    
-                    for i in range(augmentation_factor):
-                        transform = random.choice(augmentation_transforms)
-                        augmented = apply_augmentation(image, transform)
-                        
-                        aug_filename = f"aug_{i}_{img_file.stem}.jpg"
-                        cv2.imwrite(str(output_split_dir / aug_filename), augmented)
+                for img_file in image_files:
+                    transforms = [random.choice(augmentation_transforms) for _ in range(augmentation_factor)]
+                    tasks.append((str(img_file), str(output_split_dir), transforms))
+    
+    with ProcessPoolExecutor(max_workers=mp.cpu_count()) as executor:
+        for _ in tqdm(executor.map(augment_image_task, tasks, chunksize=16), total=len(tasks), desc="Augmenting images"):
+            pass
+
+def augment_image_task(task):
+    img_file, output_split_dir, transforms = task
+    img_file = Path(img_file)
+    output_split_dir = Path(output_split_dir)
+    
+    image = cv2.imread(str(img_file))
+    
+    cv2.imwrite(str(output_split_dir / img_file.name), image)
+    
+    for i, transform in enumerate(transforms):
+        augmented = apply_augmentation(image, transform)
+        
+        aug_filename = f"aug_{i}_{img_file.stem}.jpg"
+        cv2.imwrite(str(output_split_dir / aug_filename), augmented)
 
 def apply_augmentation(image, transform):
     if 'rotation' in transform:
@@ -337,21 +422,16 @@ def apply_augmentation(image, transform):
         matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
         image = cv2.warpAffine(image, matrix, (w, h))
     
-    if 'brightness' in transform:
-        factor = transform['brightness']
-        image = cv2.convertScaleAbs(image, alpha=factor, beta=0)
-    
-    if 'contrast' in transform:
-        factor = transform['contrast']
+    if 'brightness' in transform or 'contrast' in transform:
+        factor = transform.get('brightness', 1.0) * transform.get('contrast', 1.0)
         image = cv2.convertScaleAbs(image, alpha=factor, beta=0)
     
     if 'blur' in transform:
         kernel_size = transform['blur']
-        image = cv2.GaussianBlur(image, (kernel_size*2+1, kernel_size*2+1), 0)
+        image = gaussian_blur(image, kernel_size*2+1)
     
     if transform.get('sharpen'):
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        image = cv2.filter2D(image, -1, kernel)
+        image = cv2.filter2D(image, -1, SHARPEN_KERNEL)
     
     return image
 
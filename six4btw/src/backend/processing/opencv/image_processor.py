@@ -2,6 +2,41 @@ import cv2
 import numpy as np
 from PIL import Image
 
+BLUR_KERNEL = cv2.getGaussianKernel(15, 0)
+
+_SIFT = None
+_ORB = None
+
+def get_sift():
+    global _SIFT
+    if _SIFT is None:
+        _SIFT = cv2.SIFT_create()
+    return _SIFT
+
+def count_sift_keypoints(gray):
+    return len(get_sift().detect(gray, None))
+
+def get_orb():
+    global _ORB
+    if _ORB is None:
+        _ORB = cv2.ORB_create()
+    return _ORB
+
+_FACE_CASCADE = None
+_EYE_CASCADE = None
+
+def get_face_cascade():
+    global _FACE_CASCADE
+    if _FACE_CASCADE is None:
+        _FACE_CASCADE = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    return _FACE_CASCADE
+
+def get_eye_cascade():
+    global _EYE_CASCADE
+    if _EYE_CASCADE is None:
+        _EYE_CASCADE = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+    return _EYE_CASCADE
+
 def preprocess_image(image_path, target_size=(224, 224)):
     img = cv2.imread(image_path)
     img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
@@ -15,11 +50,9 @@ def preprocess_image(image_path, target_size=(224, 224)):
 def extract_performative_features(image):
     gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
     
-    sift = cv2.SIFT_create()
-    keypoints, descriptors = sift.detectAndCompute(gray, None)
+    sift_keypoints = count_sift_keypoints(gray)
     
-    orb = cv2.ORB_create()
-    kp_orb, desc_orb = orb.detectAndCompute(gray, None)
+    kp_orb, desc_orb = get_orb().detectAndCompute(gray, None)
     
     edges = cv2.Canny(gray, 50, 150)
     
@@ -29,14 +62,16 @@ def extract_performative_features(image):
     hist_g = cv2.calcHist([image], [1], None, [256], [0, 256])
     hist_b = cv2.calcHist([image], [2], None, [256], [0, 256])
     
+    mean, std = cv2.meanStdDev(gray)
+    
     features = {
-        'sift_keypoints': len(keypoints) if keypoints else 0,
+        'sift_keypoints': sift_keypoints,
         'orb_keypoints': len(kp_orb) if kp_orb else 0,
         'contour_count': len(contours),
-        'edge_density': np.sum(edges > 0) / edges.size,
+        'edge_density': cv2.countNonZero(edges) / edges.size,
         'color_variance': np.var(image),
-        'brightness': np.mean(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)),
-        'contrast': np.std(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY))
+        'brightness': float(mean[0, 0]),
+        'contrast': float(std[0, 0])
     }
     
     return features
@@ -44,17 +79,18 @@ def extract_performative_features(image):
 def detect_objects_cascade(image):
     gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
     
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+    faces = get_face_cascade().detectMultiScale(gray, 1.1, 4)
     
-    faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-    eyes = eye_cascade.detectMultiScale(gray, 1.1, 4)
+    eye_boxes = []
+    for x, y, w, h in faces:
+        for ex, ey, ew, eh in get_eye_cascade().detectMultiScale(gray[y:y + h, x:x + w], 1.1, 4):
+            eye_boxes.append([int(x + ex), int(y + ey), int(ew), int(eh)])
     
     return {
         'faces': len(faces),
-        'eyes': len(eyes),
+        'eyes': len(eye_boxes),
         'face_boxes': faces.tolist() if len(faces) > 0 else [],
-        'eye_boxes': eyes.tolist() if len(eyes) > 0 else []
+        'eye_boxes': eye_boxes
     }
 
 def apply_aesthetic_filters(image):
@@ -65,7 +101,7 @@ def apply_aesthetic_filters(image):
                             [0.393, 0.769, 0.189]])
     sepia = cv2.transform(image, sepia_kernel)
     
-    blur = cv2.GaussianBlur(image, (15, 15), 0)
+    blur = cv2.sepFilter2D(image, -1, BLUR_KERNEL, BLUR_KERNEL)
     
     return {
         'vintage': vintage_filter,
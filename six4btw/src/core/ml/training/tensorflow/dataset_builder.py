@@ -5,68 +5,173 @@ import numpy as np
 from pathlib import Path
 
 class PerformativeDatasetBuilder:
-    def __init__(self, data_dir, batch_size=32, img_size=(224, 224)):
+    def __init__(self, data_dir, batch_size=32, img_size=(224, 224), cache_dir=None, tfrecord_dir=None):
         self.data_dir = Path(data_dir)
+        self.tfrecord_dir = Path(tfrecord_dir) if tfrecord_dir else self.data_dir / 'tfrecords'
         self.batch_size = batch_size
         self.img_size = img_size
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.class_names = ['authentic', 'performative']
+        self.random_rotation = tf.keras.layers.RandomRotation(0.2 / (2 * np.pi))
+        self._split_files = {}
         
-    def _parse_image(self, filename, label):
+    def _decode_image(self, image_string, is_png):
+        image = tf.cond(
+            is_png,
+            lambda: tf.io.decode_png(image_string, channels=3),
+            lambda: tf.io.decode_jpeg(image_string, channels=3, fancy_upscaling=False, dct_method='INTEGER_FAST')
+        )
+        image = tf.image.convert_image_dtype(image, tf.float32)
+        return tf.image.resize(image, self.img_size)
+    
+    def _read_image(self, filename, label):
         image_string = tf.io.read_file(filename)
-        image = tf.image.decode_image(image_string, channels=3)
-        image = tf.image.resize(image, self.img_size)
-        image = tf.cast(image, tf.float32) / 255.0
-        return image, label
+        is_png = tf.strings.regex_full_match(tf.strings.lower(filename), r'.*\.png')
+        return image_string, is_png, label
     
-    def _augment_image(self, image, label):
-        image = tf.image.random_flip_left_right(image)
-        image = tf.image.random_brightness(image, 0.2)
-        image = tf.image.random_contrast(image, 0.8, 1.2)
-        image = tf.image.random_saturation(image, 0.8, 1.2)
-        image = tf.image.random_hue(image, 0.1)
-        
-        angle = tf.random.uniform([], -0.2, 0.2)
-        image = tf.contrib.image.rotate(image, angle)
+    def _decode_example(self, image_string, is_png, label):
+        return self._decode_image(image_string, is_png), label
+    
+    def _parse_tfrecord(self, record):
+        example = tf.io.parse_single_example(record, {
+            'image': tf.io.FixedLenFeature([], tf.string),
+            'format': tf.io.FixedLenFeature([], tf.string),
+            'label': tf.io.FixedLenFeature([], tf.int64)
+        })
+        return example['image'], tf.equal(example['format'], b'png'), tf.cast(example['label'], tf.int32)
+    
+    def _list_images(self, split):
+        if split not in self._split_files:
+            split_dir = self.data_dir / split
+            
+            image_paths = []
+            labels = []
+            
+            for class_idx, class_name in enumerate(self.class_names):
+                class_dir = split_dir / class_name
+                if class_dir.is_dir():
+                    with os.scandir(class_dir) as entries:
+                        for entry in entries:
+                            if entry.name.endswith(('.jpg', '.png')) and entry.is_file():
+                                image_paths.append(entry.path)
+                                labels.append(class_idx)
+            
+            self._split_files[split] = (image_paths, labels)
         
-        return image, label
+        return self._split_files[split]
     
-    def create_dataset(self, split='train'):
+    def _file_dataset(self, split):
         split_dir = self.data_dir / split
+        shuffle = split == 'train'
         
-        image_paths = []
-        labels = []
+        _, labels = self._list_images(split)
+        class_counts = np.bincount(labels, minlength=len(self.class_names))
         
+        class_datasets = []
         for class_idx, class_name in enumerate(self.class_names):
             class_dir = split_dir / class_name
-            if class_dir.exists():
-                for img_path in class_dir.glob('*.jpg'):
-                    image_paths.append(str(img_path))
-                    labels.append(class_idx)
-                for img_path in class_dir.glob('*.png'):
-                    image_paths.append(str(img_path))
-                    labels.append(class_idx)
+            if class_counts[class_idx] == 0:
+                raise ValueError(f"No .jpg or .png images found for class '{class_name}' in {class_dir}")
+            files = tf.data.Dataset.list_files([str(class_dir / '*.jpg'), str(class_dir / '*.png')], shuffle=shuffle)
+            class_datasets.append(files.map(lambda filename, label=class_idx: (filename, label)))
+        
+        if shuffle:
+            weights = (class_counts / class_counts.sum()).tolist()
+            return tf.data.Dataset.sample_from_datasets(class_datasets, weights=weights)
+        
+        dataset = class_datasets[0]
+        for class_dataset in class_datasets[1:]:
+            dataset = dataset.concatenate(class_dataset)
+        return dataset
+    
+    def build_tfrecords(self, out_dir=None, shard_size=2048):
+        for split in ['train', 'val', 'test']:
+            image_paths, labels = self._list_images(split)
+            split_out = (Path(out_dir) if out_dir else self.tfrecord_dir) / split
+            split_out.mkdir(parents=True, exist_ok=True)
+            for old_shard in split_out.glob('*.tfrecord'):
+                old_shard.unlink()
+            
+            order = np.random.permutation(len(image_paths))
+            for shard_idx, start in enumerate(range(0, len(order), shard_size)):
+                shard_path = split_out / f'{split}-{shard_idx:05d}.tfrecord'
+                with tf.io.TFRecordWriter(str(shard_path)) as writer:
+                    for i in order[start:start + shard_size]:
+                        image_bytes = Path(image_paths[i]).read_bytes()
+                        image_format = b'png' if image_paths[i].lower().endswith('.png') else b'jpeg'
+                        example = tf.train.Example(features=tf.train.Features(feature={
+                            'image': tf.train.Feature(bytes_list=tf.train.BytesList(value=[image_bytes])),
+                            'format': tf.train.Feature(bytes_list=tf.train.BytesList(value=[image_format])),
+                            'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[labels[i]]))
+                        }))
+                        writer.write(example.SerializeToString())
+    
+    def _augment_batch(self, images, labels):
+        batch = tf.shape(images)[0]
+        
+        images = tf.image.random_flip_left_right(images)
+        images = images + tf.random.uniform([batch, 1, 1, 1], -0.2, 0.2)
+        
+        mean = tf.reduce_mean(images, axis=[1, 2], keepdims=True)
+        images = (images - mean) * tf.random.uniform([batch, 1, 1, 1], 0.8, 1.2) + mean
+        
+        hsv = tf.image.rgb_to_hsv(tf.clip_by_value(images, 0.0, 1.0))
+        hue = tf.math.floormod(hsv[..., 0] + tf.random.uniform([batch, 1, 1], -0.1, 0.1), 1.0)
+        saturation = tf.clip_by_value(hsv[..., 1] * tf.random.uniform([batch, 1, 1], 0.8, 1.2), 0.0, 1.0)
+        images = tf.image.hsv_to_rgb(tf.stack([hue, saturation, hsv[..., 2]], axis=-1))
         
-        dataset = tf.data.Dataset.from_tensor_slices((image_paths, labels))
-        dataset = dataset.map(self._parse_image, num_parallel_calls=tf.data.AUTOTUNE)
+        images = self.random_rotation(images, training=True)
+        
+        return images, labels
+    
+    def _current_shards(self, split):
+        shard_paths = sorted((self.tfrecord_dir / split).glob('*.tfrecord'))
+        if not shard_paths:
+            return []
+        
+        class_dirs = [self.data_dir / split / class_name for class_name in self.class_names]
+        newest_source = max((class_dir.stat().st_mtime for class_dir in class_dirs if class_dir.is_dir()), default=0.0)
+        if min(path.stat().st_mtime for path in shard_paths) < newest_source:
+            print(f"Ignoring stale TFRecord shards in {self.tfrecord_dir / split}; rerun build_tfrecords()")
+            return []
+        
+        return [str(path) for path in shard_paths]
+    
+    def create_dataset(self, split='train'):
+        shard_files = self._current_shards(split)
+        
+        if shard_files:
+            dataset = tf.data.TFRecordDataset(shard_files, num_parallel_reads=tf.data.AUTOTUNE)
+            dataset = dataset.map(self._parse_tfrecord, num_parallel_calls=tf.data.AUTOTUNE)
+        else:
+            dataset = self._file_dataset(split)
+            dataset = dataset.map(self._read_image, num_parallel_calls=tf.data.AUTOTUNE)
+        
+        if self.cache_dir:
+            dataset = dataset.map(self._decode_example, num_parallel_calls=tf.data.AUTOTUNE)
+            dataset = dataset.cache(str(self.cache_dir / split))
+        else:
+            dataset = dataset.cache()
+            dataset = dataset.map(self._decode_example, num_parallel_calls=tf.data.AUTOTUNE)
         
         if split == 'train':
-            dataset = dataset.map(self._augment_image, num_parallel_calls=tf.data.AUTOTUNE)
             dataset = dataset.shuffle(buffer_size=1000)
         
         dataset = dataset.batch(self.batch_size)
+        
+        if split == 'train':
+            dataset = dataset.map(self._augment_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        
         dataset = dataset.prefetch(tf.data.AUTOTUNE)
         
         return dataset
     
     def get_class_weights(self):
-        train_dir = self.data_dir / 'train'
-        class_counts = {}
-        
-        for class_name in self.class_names:
-            class_dir = train_dir / class_name
-            if class_dir.exists():
-                count = len(list(class_dir.glob('*.jpg'))) + len(list(class_dir.glob('*.png')))
-                class_counts[class_name] = count
+        _, labels = self._list_images('train')
+        label_counts = np.bincount(labels, minlength=len(self.class_names))
+        class_counts = {
+            class_name: int(label_counts[idx]) for idx, class_name in enumerate(self.class_names)
+        }
         
         total_samples = sum(class_counts.values())
         class_weights = {}
@@ -2,59 +2,152 @@ import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import torch
+    import torch.nn.functional as F
+except ImportError:
+    torch = None
+
+def lbp_offsets(radius, n_points):
+    angles = 2 * np.pi * np.arange(n_points) / n_points
+    dx = (radius + radius * np.cos(angles)).astype(np.int32) - radius
+    dy = (radius + radius * np.sin(angles)).astype(np.int32) - radius
+    return dx, dy
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def lbp_codes(gray, dx, dy, radius, out):
+        for i in prange(radius, gray.shape[0] - radius):
+            for j in range(radius, gray.shape[1] - radius):
+                center = gray[i, j]
+                code = 0
+                for k in range(dx.shape[0]):
+                    code <<= 1
+                    if gray[i + dx[k], j + dy[k]] >= center:
+                        code |= 1
+                out[i, j] = code & 0xFF
+else:
+    def lbp_codes(gray, dx, dy, radius, out):
+        h, w = gray.shape
+        center = gray[radius:h - radius, radius:w - radius]
+        code = np.zeros(center.shape, dtype=np.uint32)
+        for k in range(dx.shape[0]):
+            neighbor = gray[radius + dx[k]:h - radius + dx[k], radius + dy[k]:w - radius + dy[k]]
+            code <<= 1
+            code |= neighbor >= center
+        out[radius:h - radius, radius:w - radius] = code & 0xFF
+
+KMEANS_SAMPLE_SIZE = 10000
+DETECTOR_POOL = ThreadPoolExecutor(max_workers=4)
+HSV_BIN_OFFSETS = np.array([0, 180, 436], dtype=np.uint16)
+RGB_BIN_OFFSETS = np.array([0, 256, 512], dtype=np.uint16)
+MB_LBP_NEIGHBORS = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0)]
+
+def mb_lbp_histogram(gray, block_size=2):
+    if min(gray.shape[:2]) < 3 * block_size:
+        return np.zeros(256, dtype=np.intp)
+    
+    ii = cv2.integral(gray)
+    sums = ii[block_size:, block_size:] - ii[:-block_size, block_size:] - ii[block_size:, :-block_size] + ii[:-block_size, :-block_size]
+    
+    h = sums.shape[0] - 2 * block_size
+    w = sums.shape[1] - 2 * block_size
+    center = sums[block_size:block_size + h, block_size:block_size + w]
+    
+    code = np.zeros((h, w), dtype=np.uint8)
+    for bit, (dy, dx) in enumerate(MB_LBP_NEIGHBORS):
+        neighbor = sums[dy * block_size:dy * block_size + h, dx * block_size:dx * block_size + w]
+        code |= (neighbor >= center).view(np.uint8) << bit
+    
+    return np.bincount(code.ravel(), minlength=256)
 
 class PerformativeFeatureExtractor:
     def __init__(self):
         self.sift = cv2.SIFT_create(nfeatures=500)
         self.orb = cv2.ORB_create(nfeatures=500)
         self.surf = None
+        self.gabor_kernels = np.stack([
+            cv2.getGaborKernel((21, 21), 5, np.radians(theta), 2*np.pi*frequency, 0.5, 0, ktype=cv2.CV_32F)
+            for theta in range(0, 180, 30)
+            for frequency in [0.1, 0.3, 0.5]
+        ])
+        self._gabor_weight = None
+        self._buffers = {}
+        self.cuda_canny = None
+        
+        try:
+            if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                self.cuda_canny = cv2.cuda.createCannyEdgeDetector(50, 150)
+                self._gpu_image = cv2.cuda_GpuMat()
+        except (AttributeError, cv2.error):
+            pass
         
         try:
             self.surf = cv2.xfeatures2d.SURF_create(hessianThreshold=400)
         except:
             pass
     
+    def _buffer(self, name, shape):
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buffer
+    
     def extract_color_features(self, image):
-        hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+        hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV, dst=self._buffer('hsv', image.shape))
         
-        hist_h = cv2.calcHist([hsv], [0], None, [180], [0, 180])
-        hist_s = cv2.calcHist([hsv], [1], None, [256], [0, 256])
-        hist_v = cv2.calcHist([hsv], [2], None, [256], [0, 256])
+        packed = hsv.reshape(-1, 3) + HSV_BIN_OFFSETS
+        hist = np.bincount(packed.ravel(), minlength=HSV_BIN_OFFSETS[-1] + 256).astype(np.float32)
+        hist_h, hist_s, hist_v = np.split(hist, HSV_BIN_OFFSETS[1:])
         
         dominant_colors = self._extract_dominant_colors(image)
         
         color_moments = self._calculate_color_moments(image)
         
         return {
-            'hue_histogram': hist_h.flatten(),
-            'saturation_histogram': hist_s.flatten(),
-            'value_histogram': hist_v.flatten(),
+            'hue_histogram': hist_h,
+            'saturation_histogram': hist_s,
+            'value_histogram': hist_v,
             'dominant_colors': dominant_colors,
             'color_moments': color_moments
         }
     
     def _extract_dominant_colors(self, image, k=5):
         data = image.reshape((-1, 3))
+        if len(data) > KMEANS_SAMPLE_SIZE:
+            data = data[np.random.default_rng(0).integers(0, len(data), KMEANS_SAMPLE_SIZE)]
         data = np.float32(data)
         
         criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
-        _, labels, centers = cv2.kmeans(data, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+        _, labels, centers = cv2.kmeans(data, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
         
         return centers.astype(int).tolist()
     
     def _calculate_color_moments(self, image):
-        moments = []
-        for channel in range(3):
-            channel_data = image[:, :, channel].flatten()
-            mean = np.mean(channel_data)
-            std = np.std(channel_data)
-            skewness = np.mean(((channel_data - mean) / std) ** 3)
-            moments.extend([mean, std, skewness])
-        
-        return moments
+        packed = image.reshape(-1, 3) + RGB_BIN_OFFSETS
+        counts = np.bincount(packed.ravel(), minlength=768).reshape(3, 256).astype(np.float64)
+        
+        n = counts.sum(axis=1)
+        levels = np.arange(256, dtype=np.float64)
+        mean = counts @ levels / n
+        centered = levels - mean[:, None]
+        std = np.sqrt((counts * centered ** 2).sum(axis=1) / n)
+        third = (counts * centered ** 3).sum(axis=1) / n
+        skewness = np.divide(third, std ** 3, out=np.zeros(3), where=std > 0)
+        
+        return np.column_stack((mean, std, skewness)).ravel().tolist()
     
-    def extract_texture_features(self, image):
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    def extract_texture_features(self, image, gray=None):
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
         
         lbp_features = self._calculate_lbp(gray)
         
@@ -68,137 +161,144 @@ class PerformativeFeatureExtractor:
             'gabor': gabor_features
         }
     
-    def _calculate_lbp(self, gray_image, radius=3, n_points=24):
+    def _calculate_lbp(self, gray_image, radius=3, n_points=24, block_size=2):
+        if block_size:
+            return mb_lbp_histogram(gray_image, block_size)
+        
         lbp = np.zeros_like(gray_image)
+        dx, dy = lbp_offsets(radius, n_points)
+        lbp_codes(gray_image, dx, dy, radius, lbp)
         
-        for i in range(radius, gray_image.shape[0] - radius):
-            for j in range(radius, gray_image.shape[1] - radius):
-                center = gray_image[i, j]
-                binary_string = ''
-                
-                for k in range(n_points):
-                    angle = 2 * np.pi * k / n_points
-                    x = int(i + radius * np.cos(angle))
-                    y = int(j + radius * np.sin(angle))
-                    
-                    if gray_image[x, y] >= center:
-                        binary_string += '1'
-                    else:
-                        binary_string += '0'
-                
-                lbp[i, j] = int(binary_string, 2)
-        
-        hist, _ = np.histogram(lbp.ravel(), bins=256, range=(0, 256))
-        return hist
+        return np.bincount(lbp.ravel(), minlength=256)
     
     def _calculate_glcm(self, gray_image):
-        from skimage.feature import greycomatrix, greycoprops
+        try:
+            from skimage.feature import graycomatrix, graycoprops
+        except ImportError:
+            from skimage.feature import greycomatrix as graycomatrix, greycoprops as graycoprops
         
         distances = [1, 2, 3]
         angles = [0, np.pi/4, np.pi/2, 3*np.pi/4]
         
-        glcm = greycomatrix(gray_image, distances=distances, angles=angles, 
-                           levels=256, symmetric=True, normed=True)
+        quantized = gray_image >> 3
+        glcm = graycomatrix(quantized, distances=distances, angles=angles,
+                            levels=32, symmetric=True, normed=True)
         
         properties = ['contrast', 'dissimilarity', 'homogeneity', 'energy']
         features = []
         
         for prop in properties:
-            feature_values = greycoprops(glcm, prop)
+            feature_values = graycoprops(glcm, prop)
             features.extend(feature_values.flatten())
         
         return features
     
     def _calculate_gabor_features(self, gray_image):
+        if torch is not None and torch.cuda.is_available():
+            if self._gabor_weight is None:
+                self._gabor_weight = torch.from_numpy(self.gabor_kernels)[:, None].cuda()
+            
+            with torch.inference_mode():
+                gray = torch.from_numpy(gray_image).cuda().float()[None, None]
+                gray = F.pad(gray, (10, 10, 10, 10), mode='reflect')
+                filtered = F.conv2d(gray, self._gabor_weight)[0].round_().clamp_(0, 255)
+                mean = filtered.mean(dim=(-2, -1))
+                std = filtered.std(dim=(-2, -1), correction=0)
+                return torch.stack((mean, std), dim=1).flatten().tolist()
+        
         features = []
         
-        for theta in range(0, 180, 30):
-            for frequency in [0.1, 0.3, 0.5]:
-                kernel = cv2.getGaborKernel((21, 21), 5, np.radians(theta), 
-                                         2*np.pi*frequency, 0.5, 0, ktype=cv2.CV_32F)
-                filtered = cv2.filter2D(gray_image, cv2.CV_8UC3, kernel)
-                
-                features.append(np.mean(filtered))
-                features.append(np.std(filtered))
+        for kernel in self.gabor_kernels:
+            filtered = cv2.filter2D(gray_image, cv2.CV_8U, kernel)
+            
+            features.append(np.mean(filtered))
+            features.append(np.std(filtered))
         
         return features
     
-    def extract_shape_features(self, image):
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        
-        edges = cv2.Canny(gray, 50, 150)
+    def _detect_edges(self, image, gray=None):
+        if self.cuda_canny is not None:
+            if gray is None:
+                self._gpu_image.upload(image)
+                gray_gpu = cv2.cuda.cvtColor(self._gpu_image, cv2.COLOR_RGB2GRAY)
+            else:
+                self._gpu_image.upload(gray)
+                gray_gpu = self._gpu_image
+            return self.cuda_canny.detect(gray_gpu).download()
+        
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        return cv2.Canny(gray, 50, 150)
+    
+    def extract_shape_features(self, image, gray=None):
+        edges = self._detect_edges(image, gray)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        shape_features = {
+        areas = np.fromiter((cv2.contourArea(contour) for contour in contours), dtype=np.float64, count=len(contours))
+        kept = [contour for contour, keep in zip(contours, areas > 100) if keep]
+        areas = areas[areas > 100]
+        
+        perimeters = np.fromiter((cv2.arcLength(contour, True) for contour in kept), dtype=np.float64, count=len(kept))
+        rects = np.fromiter((cv2.boundingRect(contour) for contour in kept), dtype=(np.float64, 4), count=len(kept))
+        hull_areas = np.fromiter((cv2.contourArea(cv2.convexHull(contour)) for contour in kept), dtype=np.float64, count=len(kept))
+        has_hull = hull_areas > 0
+        
+        return {
             'contour_count': len(contours),
-            'total_area': 0,
-            'total_perimeter': 0,
-            'aspect_ratios': [],
-            'solidity_values': [],
-            'extent_values': []
+            'total_area': float(areas.sum()),
+            'total_perimeter': float(perimeters.sum()),
+            'aspect_ratios': rects[:, 2] / rects[:, 3],
+            'solidity_values': areas[has_hull] / hull_areas[has_hull],
+            'extent_values': areas / (rects[:, 2] * rects[:, 3])
         }
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            perimeter = cv2.arcLength(contour, True)
-            
-            if area > 100:
-                shape_features['total_area'] += area
-                shape_features['total_perimeter'] += perimeter
-                
-                x, y, w, h = cv2.boundingRect(contour)
-                aspect_ratio = float(w) / h
-                shape_features['aspect_ratios'].append(aspect_ratio)
-                
-                hull = cv2.convexHull(contour)
-                hull_area = cv2.contourArea(hull)
-                if hull_area > 0:
-                    solidity = float(area) / hull_area
-                    shape_features['solidity_values'].append(solidity)
-                
-                rect_area = w * h
-                extent = float(area) / rect_area
-                shape_features['extent_values'].append(extent)
-        
-        return shape_features
-    
-    def extract_keypoint_features(self, image):
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    
+    def extract_keypoint_features(self, image, gray=None):
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        
+        detectors = {'sift': self.sift, 'orb': self.orb, 'surf': self.surf}
+        futures = {
+            name: DETECTOR_POOL.submit(detector.detectAndCompute, gray, None)
+            for name, detector in detectors.items() if detector
+        }
+        corners_future = DETECTOR_POOL.submit(
+            cv2.goodFeaturesToTrack, gray, maxCorners=100, qualityLevel=0.01, minDistance=10
+        )
         
         features = {}
         
-        if self.sift:
-            kp_sift, desc_sift = self.sift.detectAndCompute(gray, None)
-            features['sift_keypoints'] = len(kp_sift) if kp_sift else 0
-            features['sift_descriptors'] = desc_sift.shape if desc_sift is not None else (0, 0)
+        for name, future in futures.items():
+            keypoints, descriptors = future.result()
+            features[f'{name}_keypoints'] = len(keypoints) if keypoints else 0
+            features[f'{name}_descriptors'] = descriptors.shape if descriptors is not None else (0, 0)
         
-        if self.orb:
-            kp_orb, desc_orb = self.orb.detectAndCompute(gray, None)
-            features['orb_keypoints'] = len(kp_orb) if kp_orb else 0
-            features['orb_descriptors'] = desc_orb.shape if desc_orb is not None else (0, 0)
-        
-        if self.surf:
-            kp_surf, desc_surf = self.surf.detectAndCompute(gray, None)
-            features['surf_keypoints'] = len(kp_surf) if kp_surf else 0
-            features['surf_descriptors'] = desc_surf.shape if desc_surf is not None else (0, 0)
-        
-        corners = cv2.goodFeaturesToTrack(gray, maxCorners=100, qualityLevel=0.01, minDistance=10)
+        corners = corners_future.result()
         features['corner_count'] = len(corners) if corners is not None else 0
         
         return features
     
     def extract_all_features(self, image):
         all_features = {}
+        image = np.ascontiguousarray(image)
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY, dst=self._buffer('gray', image.shape[:2]))
         
         all_features.update(self.extract_color_features(image))
-        all_features.update(self.extract_texture_features(image))
-        all_features.update(self.extract_shape_features(image))
-        all_features.update(self.extract_keypoint_features(image))
+        all_features.update(self.extract_texture_features(image, gray))
+        all_features.update(self.extract_shape_features(image, gray))
+        all_features.update(self.extract_keypoint_features(image, gray))
         
         return all_features
 
+_local = threading.local()
+
+def get_extractor():
+    extractor = getattr(_local, 'extractor', None)
+    if extractor is None:
+        extractor = _local.extractor = PerformativeFeatureExtractor()
+    return extractor
+
 def analyze_performative_aesthetics(image_path):
-    extractor = PerformativeFeatureExtractor()
+    extractor = get_extractor()
     
     image = cv2.imread(image_path)
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
@@ -217,8 +317,8 @@ def calculate_aesthetic_score(features):
     score = 0
     
     if 'dominant_colors' in features:
-        muted_colors = sum(1 for color in features['dominant_colors'] 
-                          if all(50 <= c <= 200 for c in color))
+        colors = np.asarray(features['dominant_colors']).reshape(-1, 3)
+        muted_colors = int(((colors >= 50) & (colors <= 200)).all(axis=1).sum())
         score += muted_colors * 5
     
     if 'sift_keypoints' in features:
@@ -1,48 +1,94 @@
+import cv2
 import torch
 import torch.nn.functional as F
-import torchvision.transforms as transforms
+from torchvision.models.feature_extraction import create_feature_extractor
 from PIL import Image
 import numpy as np
+import os
 import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+INPUT_SIZE = (224, 224)
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
 class PerformativeInferenceEngine:
     def __init__(self, model_path, device=None):
-        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = torch.device(device) if device else torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
-        self.transform = self._get_inference_transforms()
+        self.feature_model = None
+        if self.device.type == 'cuda':
+            self.dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        else:
+            self.dtype = torch.float32
+        mean = torch.from_numpy(IMAGENET_MEAN).view(1, 3, 1, 1)
+        std = torch.from_numpy(IMAGENET_STD).view(1, 3, 1, 1)
+        self._norm_scale = (1.0 / (255.0 * std)).to(self.device)
+        self._norm_shift = (-mean / std).to(self.device)
         self.class_names = ['authentic', 'performative']
         self.load_model(model_path)
         
-    def _get_inference_transforms(self):
-        return transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
-    
     def load_model(self, model_path):
         try:
             from performative_net import PerformativeNet
-            self.model = PerformativeNet(num_classes=2)
-            self.model.load_state_dict(torch.load(model_path, map_location=self.device))
-            self.model.to(self.device)
-            self.model.eval()
+            model = PerformativeNet(num_classes=2)
+            model.load_state_dict(torch.load(model_path, map_location=self.device))
+            model = model.to(self.device, dtype=self.dtype, memory_format=torch.channels_last).eval()
+            self.feature_model = create_feature_extractor(model, return_nodes={'conv4': 'features'}).eval()
+            if self.device.type == 'cuda':
+                model = torch.compile(model, mode='reduce-overhead')
+            self.model = model
         except Exception as e:
             print(f"Error loading model: {e}")
             self.model = None
     
-    def preprocess_image(self, image_input):
+    def _image_tensor(self, image_input):
         if isinstance(image_input, str):
-            image = Image.open(image_input).convert('RGB')
+            image = cv2.imread(image_input, cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError(f"Could not read image: {image_input}")
+            image = cv2.resize(image, INPUT_SIZE, interpolation=cv2.INTER_AREA)
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         elif isinstance(image_input, Image.Image):
-            image = image_input.convert('RGB')
+            image = cv2.resize(np.asarray(image_input.convert('RGB')), INPUT_SIZE, interpolation=cv2.INTER_AREA)
         elif isinstance(image_input, np.ndarray):
-            image = Image.fromarray(image_input).convert('RGB')
+            image = cv2.resize(image_input, INPUT_SIZE, interpolation=cv2.INTER_AREA)
+            if image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+            elif image.shape[2] == 4:
+                image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
         else:
             raise ValueError("Unsupported image input type")
         
-        tensor = self.transform(image).unsqueeze(0)
-        return tensor.to(self.device)
+        return torch.from_numpy(np.ascontiguousarray(image)).permute(2, 0, 1)
+    
+    def _normalize(self, batch):
+        batch = batch.to(self.device, non_blocking=True)
+        batch = torch.addcmul(self._norm_shift, batch.float(), self._norm_scale)
+        return batch.to(dtype=self.dtype, memory_format=torch.channels_last)
+    
+    def preprocess_image(self, image_input):
+        tensor = self._image_tensor(image_input).unsqueeze(0)
+        return self._normalize(tensor)
+    
+    def _format_result(self, probabilities, prediction_time):
+        predicted = int(np.argmax(probabilities))
+        return {
+            'predicted_class': self.class_names[predicted],
+            'confidence': float(probabilities[predicted]),
+            'probabilities': {
+                'authentic': float(probabilities[0]),
+                'performative': float(probabilities[1])
+            },
+            'processing_time_ms': prediction_time,
+            'performative_score': int(probabilities[1] * 100)
+        }
     
     def predict(self, image_input):
         if self.model is None:
@@ -53,25 +99,13 @@ class PerformativeInferenceEngine:
         try:
             image_tensor = self.preprocess_image(image_input)
             
-            with torch.no_grad():
+            with torch.inference_mode():
                 outputs = self.model(image_tensor)
-                probabilities = F.softmax(outputs, dim=1)
-                confidence, predicted = torch.max(probabilities, 1)
+                probabilities = F.softmax(outputs.float(), dim=1)[0].cpu().numpy()
                 
                 prediction_time = (time.time() - start_time) * 1000
                 
-                result = {
-                    'predicted_class': self.class_names[predicted.item()],
-                    'confidence': confidence.item(),
-                    'probabilities': {
-                        'authentic': probabilities[0][0].item(),
-                        'performative': probabilities[0][1].item()
-                    },
-                    'processing_time_ms': prediction_time,
-                    'performative_score': int(probabilities[0][1].item() * 100)
-                }
-                
-                return result
+                return self._format_result(probabilities, prediction_time)
                 
         except Exception as e:
             print(f"Prediction error: {e}")
@@ -91,11 +125,33 @@ class PerformativeInferenceEngine:
         }
     
     def batch_predict(self, image_list):
-        results = []
-        for image in image_list:
-            result = self.predict(image)
-            results.append(result)
-        return results
+        image_list = list(image_list)
+        if self.model is None:
+            return [self._fallback_prediction() for _ in image_list]
+        if not image_list:
+            return []
+        
+        start_time = time.time()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(8, len(image_list))) as executor:
+                batch = torch.stack(list(executor.map(self._image_tensor, image_list)))
+            
+            if self.device.type == 'cuda':
+                batch = batch.pin_memory()
+            batch = self._normalize(batch)
+            
+            with torch.inference_mode():
+                outputs = self.model(batch)
+            probabilities = F.softmax(outputs.float(), dim=1).cpu().numpy()
+            
+            prediction_time = (time.time() - start_time) * 1000 / len(image_list)
+            
+            return [self._format_result(probs, prediction_time) for probs in probabilities]
+            
+        except Exception as e:
+            print(f"Batch prediction error: {e}")
+            return [self.predict(image) for image in image_list]
     
     def extract_features(self, image_input):
         if self.model is None:
@@ -103,19 +159,21 @@ class PerformativeInferenceEngine:
         
         image_tensor = self.preprocess_image(image_input)
         
-        with torch.no_grad():
-            features = self.model.conv4(
-                self.model.conv3(
-                    self.model.conv2(
-                        self.model.conv1(image_tensor)
-                    )
-                )
-            )
-            
+        with torch.inference_mode():
+            features = self.feature_model(image_tensor)['features']
             pooled_features = F.adaptive_avg_pool2d(features, (1, 1))
-            flattened = pooled_features.view(pooled_features.size(0), -1)
             
-            return flattened.cpu().numpy().flatten()
+            return pooled_features.float().cpu().numpy().flatten()
+
+@lru_cache(maxsize=None)
+def _cached_inference_engine(model_path, device):
+    return PerformativeInferenceEngine(model_path, device)
+
+def get_inference_engine(model_path, device=None):
+    device = torch.device(device) if device else torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    if device.type == 'cuda' and device.index is None:
+        device = torch.device('cuda', torch.cuda.current_device())
+    return _cached_inference_engine(os.path.abspath(model_path), str(device))
 
 class PerformativeItemDetector:
     def __init__(self):
@@ -144,17 +202,32 @@ class PerformativeItemDetector:
             'flannel': 9,
             'bicycle': 13
         }
+        
+        self._keywords = {keyword for keywords in self.performative_keywords.values() for keyword in keywords}
+        self._keyword_automaton = None
+        if ahocorasick is not None:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for keyword in self._keywords:
+                self._keyword_automaton.add_word(keyword, keyword)
+            self._keyword_automaton.make_automaton()
+    
+    def _matched_keywords(self, label_lower):
+        if self._keyword_automaton is not None:
+            return {keyword for _, keyword in self._keyword_automaton.iter(label_lower)}
+        return {keyword for keyword in self._keywords if keyword in label_lower}
     
     def detect_items(self, image_labels):
         detected_items = []
         total_score = 0
         
         for label in image_labels:
-            label_lower = label.lower()
+            matched = self._matched_keywords(label.lower())
+            if not matched:
+                continue
             
             for item, keywords in self.performative_keywords.items():
                 for keyword in keywords:
-                    if keyword in label_lower:
+                    if keyword in matched:
                         score = self.item_scores.get(item, 5)
                         detected_items.append({
                             'item': item,
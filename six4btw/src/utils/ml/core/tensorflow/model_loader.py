@@ -43,6 +43,11 @@ class PerformativeDetector:
     def __init__(self, model_path=None):
         self.model = create_performative_classifier()
         self.is_loaded = False
+        self.feature_extractor = tf.keras.Model(
+            inputs=self.model.input,
+            outputs=self.model.layers[-3].output
+        )
+        self._extract = tf.function(self._run_feature_extractor, jit_compile=True)
         
         if model_path:
             self.is_loaded = load_pretrained_weights(self.model, model_path)
@@ -55,12 +60,10 @@ class PerformativeDetector:
         prediction = self.model.predict(processed, verbose=0)
         return float(prediction[0][0])
     
+    def _run_feature_extractor(self, processed):
+        return self.feature_extractor(processed, training=False)
+    
     def extract_features(self, image_tensor):
-        feature_extractor = tf.keras.Model(
-            inputs=self.model.input,
-            outputs=self.model.layers[-3].output
-        )
-        
         processed = preprocess_image_tensor(image_tensor)
-        features = feature_extractor.predict(processed, verbose=0)
+        features = self._extract(processed).numpy()
         return features.flatten()
\ No newline at end of file